@@ -4108,7 +4108,13 @@ class VLANSettingsAdmin(Singleton):
             success, message = service.apply_network_mode(obj)
             
             if success:
-                if obj.auto_restart_on_change:
+                if not service.config_changed:
+                    messages.add_message(
+                        request, 
+                        messages.SUCCESS, 
+                        f'VLAN Settings saved. {message}. Network configuration was already up to date, no restart needed.'
+                    )
+                elif obj.auto_restart_on_change:
                     messages.add_message(
                         request, 
                         messages.SUCCESS, 
@@ -6,10 +6,16 @@ Automated threat response configuration
 import os
 import logging
 import subprocess
+import threading
 from pathlib import Path
 from django.conf import settings
 from .monitoring import security_monitor
 
+try:
+    from fail2ban.client.csocket import CSocket
+except ImportError:
+    CSocket = None
+
 logger = logging.getLogger('security')
 
 
@@ -23,6 +29,9 @@ class Fail2BanManager:
         self.jail_local_path = os.path.join(self.config_dir, 'jail.local')
         self.filter_dir = os.path.join(self.config_dir, 'filter.d')
         self.action_dir = os.path.join(self.config_dir, 'action.d')
+        self.socket_path = getattr(settings, 'FAIL2BAN_SOCKET', '/var/run/fail2ban/fail2ban.sock')
+        self._sock = None
+        self._sock_lock = threading.Lock()
         
     def create_pisowifi_jail_config(self):
         """
@@ -255,6 +264,121 @@ script_path = {script_path}
             logger.error(f"Error restarting fail2ban: {e}")
             return False
     
+    def _socket_command(self, *command):
+        """
+        Send a command over the persistent fail2ban server socket
+        
+        Returns the command result, or raises if the socket is unavailable
+        so the caller can fall back to fail2ban-client.
+        """
+        if CSocket is None:
+            raise RuntimeError("fail2ban python package not available")
+        
+        # The socket is not safe for concurrent use
+        with self._sock_lock:
+            try:
+                if self._sock is None:
+                    self._sock = CSocket(self.socket_path)
+                code, result = self._sock.send(list(command))
+            except Exception:
+                # Drop the connection so the next call reconnects
+                if self._sock is not None:
+                    try:
+                        self._sock.close()
+                    except Exception:
+                        pass
+                    self._sock = None
+                raise
+        
+        if code != 0:
+            raise RuntimeError(f"fail2ban command failed: {result}")
+        return result
+    
+    def _list_jails(self):
+        """
+        Get names of all configured jails
+        """
+        try:
+            result = dict(self._socket_command('status'))
+            jail_line = result.get('Jail list', '')
+            return [j.strip() for j in jail_line.split(',') if j.strip()]
+        except Exception:
+            pass
+        
+        result = subprocess.run(['fail2ban-client', 'status'], 
+                              capture_output=True, text=True)
+        if result.returncode != 0:
+            return None
+        
+        for line in result.stdout.split('\n'):
+            if 'Jail list:' in line:
+                jail_line = line.split('Jail list:')[1].strip()
+                return [j.strip() for j in jail_line.split(',') if j.strip()]
+        return []
+    
+    def _get_jail_info(self, jail):
+        """
+        Get counters and banned IPs for a single jail
+        """
+        status_info = {
+            'enabled': True,
+            'currently_failed': 0,
+            'total_failed': 0,
+            'currently_banned': 0,
+            'total_banned': 0,
+            'banned_ips': []
+        }
+        
+        try:
+            result = self._socket_command('status', jail)
+            fields = {}
+            for _section, values in result:
+                fields.update(dict(values))
+            status_info['currently_failed'] = int(fields.get('Currently failed', 0))
+            status_info['total_failed'] = int(fields.get('Total failed', 0))
+            status_info['currently_banned'] = int(fields.get('Currently banned', 0))
+            status_info['total_banned'] = int(fields.get('Total banned', 0))
+            status_info['banned_ips'] = [str(ip) for ip in fields.get('Banned IP list', [])]
+            return status_info
+        except Exception:
+            pass
+        
+        jail_result = subprocess.run(['fail2ban-client', 'status', jail], 
+                                   capture_output=True, text=True)
+        if jail_result.returncode != 0:
+            return None
+        
+        for line in jail_result.stdout.split('\n'):
+            line = line.strip()
+            if 'Currently failed:' in line:
+                status_info['currently_failed'] = int(line.split(':')[1].strip())
+            elif 'Total failed:' in line:
+                status_info['total_failed'] = int(line.split(':')[1].strip())
+            elif 'Currently banned:' in line:
+                status_info['currently_banned'] = int(line.split(':')[1].strip())
+            elif 'Total banned:' in line:
+                status_info['total_banned'] = int(line.split(':')[1].strip())
+            elif 'Banned IP list:' in line:
+                ip_line = line.split('Banned IP list:')[1].strip()
+                if ip_line:
+                    status_info['banned_ips'] = [ip.strip() for ip in ip_line.split() if ip.strip()]
+        
+        return status_info
+    
+    def _unban_from_jail(self, jail, ip_address):
+        """
+        Unban an IP address from a single jail
+        """
+        try:
+            self._socket_command('set', jail, 'unbanip', ip_address)
+            return True
+        except Exception:
+            pass
+        
+        unban_result = subprocess.run(['fail2ban-client', 'set', jail, 'unbanip', ip_address], 
+                                    capture_output=True, text=True)
+        return unban_result.returncode == 0
+    
     def get_banned_ips(self):
         """
         Get list of currently banned IPs from fail2ban
@@ -262,32 +386,12 @@ script_path = {script_path}
         banned_ips = []
         
         try:
-            # Get list of jails
-            result = subprocess.run(['fail2ban-client', 'status'], 
-                                  capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                # Parse jail names from output
-                jails = []
-                for line in result.stdout.split('\n'):
-                    if 'Jail list:' in line:
-                        jail_line = line.split('Jail list:')[1].strip()
-                        jails = [j.strip() for j in jail_line.split(',') if j.strip()]
-                        break
-                
-                # Get banned IPs from each jail
-                for jail in jails:
-                    if jail.startswith('pisowifi-'):
-                        jail_result = subprocess.run(['fail2ban-client', 'status', jail], 
-                                                   capture_output=True, text=True)
-                        
-                        if jail_result.returncode == 0:
-                            for line in jail_result.stdout.split('\n'):
-                                if 'Banned IP list:' in line:
-                                    ip_line = line.split('Banned IP list:')[1].strip()
-                                    if ip_line:
-                                        jail_ips = [ip.strip() for ip in ip_line.split() if ip.strip()]
-                                        banned_ips.extend(jail_ips)
+            # Get banned IPs from each jail
+            for jail in self._list_jails() or []:
+                if jail.startswith('pisowifi-'):
+                    status_info = self._get_jail_info(jail)
+                    if status_info:
+                        banned_ips.extend(status_info['banned_ips'])
             
         except Exception as e:
             logger.error(f"Error getting banned IPs from fail2ban: {e}")
@@ -299,25 +403,14 @@ script_path = {script_path}
         Manually unban an IP address from all jails
         """
         try:
-            # Get list of jails
-            result = subprocess.run(['fail2ban-client', 'status'], 
-                                  capture_output=True, text=True)
+            jails = self._list_jails()
             
-            if result.returncode == 0:
-                jails = []
-                for line in result.stdout.split('\n'):
-                    if 'Jail list:' in line:
-                        jail_line = line.split('Jail list:')[1].strip()
-                        jails = [j.strip() for j in jail_line.split(',') if j.strip()]
-                        break
-                
+            if jails is not None:
                 # Unban from each PISOWifi jail
                 success = True
                 for jail in jails:
                     if jail.startswith('pisowifi-'):
-                        unban_result = subprocess.run(['fail2ban-client', 'set', jail, 'unbanip', ip_address], 
-                                                    capture_output=True, text=True)
-                        if unban_result.returncode != 0:
+                        if not self._unban_from_jail(jail, ip_address):
                             success = False
                 
                 if success:
@@ -343,48 +436,11 @@ script_path = {script_path}
         jail_status = {}
         
         try:
-            result = subprocess.run(['fail2ban-client', 'status'], 
-                                  capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                jails = []
-                for line in result.stdout.split('\n'):
-                    if 'Jail list:' in line:
-                        jail_line = line.split('Jail list:')[1].strip()
-                        jails = [j.strip() for j in jail_line.split(',') if j.strip()]
-                        break
-                
-                for jail in jails:
-                    if jail.startswith('pisowifi-'):
-                        jail_result = subprocess.run(['fail2ban-client', 'status', jail], 
-                                                   capture_output=True, text=True)
-                        
-                        if jail_result.returncode == 0:
-                            status_info = {
-                                'enabled': True,
-                                'currently_failed': 0,
-                                'total_failed': 0,
-                                'currently_banned': 0,
-                                'total_banned': 0,
-                                'banned_ips': []
-                            }
-                            
-                            for line in jail_result.stdout.split('\n'):
-                                line = line.strip()
-                                if 'Currently failed:' in line:
-                                    status_info['currently_failed'] = int(line.split(':')[1].strip())
-                                elif 'Total failed:' in line:
-                                    status_info['total_failed'] = int(line.split(':')[1].strip())
-                                elif 'Currently banned:' in line:
-                                    status_info['currently_banned'] = int(line.split(':')[1].strip())
-                                elif 'Total banned:' in line:
-                                    status_info['total_banned'] = int(line.split(':')[1].strip())
-                                elif 'Banned IP list:' in line:
-                                    ip_line = line.split('Banned IP list:')[1].strip()
-                                    if ip_line:
-                                        status_info['banned_ips'] = [ip.strip() for ip in ip_line.split() if ip.strip()]
-                            
-                            jail_status[jail] = status_info
+            for jail in self._list_jails() or []:
+                if jail.startswith('pisowifi-'):
+                    status_info = self._get_jail_info(jail)
+                    if status_info:
+                        jail_status[jail] = status_info
             
         except Exception as e:
             logger.error(f"Error getting jail status: {e}")
@@ -40,6 +40,11 @@ class SecurityMonitor:
         'scanner_detections_per_hour': 2
     }
     
+    # Alert ring buffer: one cache slot per alert plus a write counter
+    ALERT_KEY_PREFIX = "security_alerts"
+    ALERT_HISTORY_SIZE = 100
+    ALERT_TIMEOUT = 86400 * 7  # 1 week
+    
     def __init__(self):
         self.alerts = []
         
@@ -170,12 +175,8 @@ class SecurityMonitor:
             'context': context or {}
         }
         
-        # Store alert
-        alert_key = "security_alerts"
-        alerts = cache.get(alert_key, [])
-        alerts.append(alert_data)
-        alerts = alerts[-100:]  # Keep last 100 alerts
-        cache.set(alert_key, alerts, 86400 * 7)  # 1 week
+        # Store alert in the next ring buffer slot (overwrites the oldest)
+        self._push_alert(alert_data)
         
         # Log alert
         logger.error(f"SECURITY_ALERT: [{threat_level}] {message}")
@@ -184,6 +185,45 @@ class SecurityMonitor:
         if threat_level in ['HIGH', 'CRITICAL'] and hasattr(settings, 'ADMINS'):
             self._send_email_alert(alert_data)
     
+    def _push_alert(self, alert_data: dict):
+        """
+        Write an alert into the fixed-size ring buffer
+        """
+        head_key = f"{self.ALERT_KEY_PREFIX}:head"
+        cache.add(head_key, 0, self.ALERT_TIMEOUT)
+        try:
+            position = cache.incr(head_key)
+        except ValueError:
+            # Counter expired between add() and incr()
+            cache.set(head_key, 1, self.ALERT_TIMEOUT)
+            position = 1
+        
+        # incr() keeps the original expiry; extend it so the head outlives
+        # the slots it indexes
+        cache.touch(head_key, self.ALERT_TIMEOUT)
+        
+        slot = (position - 1) % self.ALERT_HISTORY_SIZE
+        cache.set(f"{self.ALERT_KEY_PREFIX}:{slot}", alert_data, self.ALERT_TIMEOUT)
+    
+    def get_recent_alerts(self, limit: int = 50) -> List[dict]:
+        """
+        Get the most recent alerts, oldest first
+        
+        Only the requested slots are fetched, so the cost is independent
+        of the total number of alerts ever raised.
+        """
+        head = cache.get(f"{self.ALERT_KEY_PREFIX}:head", 0)
+        limit = min(limit, self.ALERT_HISTORY_SIZE, head)
+        if limit <= 0:
+            return []
+        
+        slot_keys = [
+            f"{self.ALERT_KEY_PREFIX}:{position % self.ALERT_HISTORY_SIZE}"
+            for position in range(head - limit, head)
+        ]
+        stored = cache.get_many(slot_keys)
+        return [stored[key] for key in slot_keys if key in stored]
+    
     def _send_email_alert(self, alert_data: dict):
         """
         Send email alert to administrators
@@ -245,7 +285,7 @@ PISOWifi Security Monitoring System
         top_ips = ip_counts.most_common(10)
         
         # Recent alerts
-        alerts = cache.get("security_alerts", [])
+        alerts = self.get_recent_alerts(self.ALERT_HISTORY_SIZE)
         recent_alerts = [
             a for a in alerts 
             if datetime.fromisoformat(a['timestamp']) >= hour_ago
@@ -114,12 +114,10 @@ def security_alerts_view(request):
     """
     View recent security alerts
     """
-    from django.core.cache import cache
-    
-    alerts = cache.get("security_alerts", [])
+    alerts = security_monitor.get_recent_alerts(50)
     
     return render(request, 'admin/security/alerts.html', {
-        'alerts': alerts[-50:],  # Show last 50 alerts
+        'alerts': alerts,  # Show last 50 alerts
         'page_title': 'Security Alerts',
     })
 
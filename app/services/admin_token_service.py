@@ -2,9 +2,13 @@
 Admin Token Service - Bypass session expiration entirely
 Uses secure tokens for admin operations that don't expire
 """
+import os
 import secrets
+import sqlite3
 import hashlib
 import json
+import threading
+import time
 from datetime import datetime, timedelta
 from django.conf import settings
 from django.core.cache import cache
@@ -13,6 +17,57 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+class TokenBackupStore:
+    """
+    Single-file SQLite store for admin token backups, keyed by token hash
+    """
+    
+    def __init__(self, db_path=None):
+        self.db_path = db_path or os.path.join(settings.BASE_DIR, '.admin_tokens.db')
+        self._conn = None
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        """Open the database on first use and make sure the schema exists"""
+        if self._conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS tokens '
+                '(hash TEXT PRIMARY KEY, data BLOB, created INTEGER)'
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+    
+    def store(self, token_hash, token_data):
+        """Insert or replace the backup for a token"""
+        payload = json.dumps(token_data)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO tokens VALUES (?, ?, ?)',
+                (token_hash, payload, int(time.time()))
+            )
+            conn.commit()
+    
+    def load(self, token_hash):
+        """Return the stored token data, or None if there is no backup"""
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT data FROM tokens WHERE hash = ?', (token_hash,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+    
+    def remove(self, token_hash):
+        """Delete the backup for a token"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute('DELETE FROM tokens WHERE hash = ?', (token_hash,))
+            conn.commit()
+
+
 class AdminTokenService:
     """
     Provides session-independent authentication tokens for admin operations
@@ -21,6 +76,8 @@ class AdminTokenService:
     def __init__(self):
         self.token_prefix = 'admin_token_'
         self.token_lifetime = timedelta(days=365)  # 1 year tokens
+        self.backup_dir = os.path.join(settings.BASE_DIR, '.admin_tokens')
+        self.backup_store = TokenBackupStore()
         
     def generate_admin_token(self, user):
         """
@@ -114,35 +171,39 @@ class AdminTokenService:
             return False
     
     def _get_backup_path(self, token_hash):
-        """Get backup file path for token"""
-        import os
-        backup_dir = os.path.join(settings.BASE_DIR, '.admin_tokens')
-        os.makedirs(backup_dir, exist_ok=True)
-        return os.path.join(backup_dir, f"{token_hash}.json")
+        """Get legacy per-token backup file path"""
+        return os.path.join(self.backup_dir, f"{token_hash}.json")
     
     def _store_token_backup(self, token_hash, token_data):
-        """Store token data to file as backup"""
+        """Store token data in the backup database"""
         try:
-            backup_path = self._get_backup_path(token_hash)
-            with open(backup_path, 'w') as f:
-                json.dump(token_data, f)
+            self.backup_store.store(token_hash, token_data)
         except Exception as e:
             logger.warning(f"Failed to store token backup: {e}")
     
     def _load_token_backup(self, token_hash):
-        """Load token data from backup file"""
+        """Load token data from the backup database"""
         try:
+            token_data = self.backup_store.load(token_hash)
+            if token_data:
+                return token_data
+            
+            # Fall back to a backup written by older versions (one file per token)
             backup_path = self._get_backup_path(token_hash)
             if os.path.exists(backup_path):
                 with open(backup_path, 'r') as f:
-                    return json.load(f)
+                    token_data = json.load(f)
+                self.backup_store.store(token_hash, token_data)
+                os.remove(backup_path)
+                return token_data
         except Exception as e:
             logger.warning(f"Failed to load token backup: {e}")
         return None
     
     def _remove_token_backup(self, token_hash):
-        """Remove token backup file"""
+        """Remove token data from the backup database"""
         try:
+            self.backup_store.remove(token_hash)
             backup_path = self._get_backup_path(token_hash)
             if os.path.exists(backup_path):
                 os.remove(backup_path)
@@ -32,11 +32,8 @@ class BackupService:
             backup.Backup_Path = backup_dir
             backup.save()
             
-            # Perform backup
-            self._perform_backup(backup, backup_dir)
-            
-            # Calculate backup size
-            backup.Backup_Size = self._calculate_directory_size(backup_dir)
+            # Perform backup (size is counted while copying)
+            backup.Backup_Size = self._perform_backup(backup, backup_dir)
             backup.Status = 'completed'
             backup.save()
             
@@ -77,11 +74,8 @@ class BackupService:
             backup.Backup_Path = backup_dir
             backup.save()
             
-            # Perform backup
-            self._perform_backup(backup, backup_dir)
-            
-            # Calculate backup size
-            backup.Backup_Size = self._calculate_directory_size(backup_dir)
+            # Perform backup (size is counted while copying)
+            backup.Backup_Size = self._perform_backup(backup, backup_dir)
             backup.Status = 'completed'
             backup.save()
             
@@ -155,7 +149,16 @@ class BackupService:
         return backup_dir
     
     def _perform_backup(self, backup, backup_dir):
-        """Perform the actual backup"""
+        """Perform the actual backup and return the number of bytes written"""
+        bytes_written = 0
+        
+        def copy_file(src, dst):
+            # Count bytes as they are copied so no second walk is needed
+            nonlocal bytes_written
+            shutil.copy2(src, dst)
+            bytes_written += os.path.getsize(dst)
+            return dst
+        
         # Define what to backup
         backup_items = []
         
@@ -163,7 +166,7 @@ class BackupService:
             # Backup database
             db_path = os.path.join(settings.BASE_DIR, 'db.sqlite3')
             if os.path.exists(db_path):
-                shutil.copy2(db_path, os.path.join(backup_dir, 'db.sqlite3'))
+                copy_file(db_path, os.path.join(backup_dir, 'db.sqlite3'))
                 backup_items.append('Database')
         
         if backup.Has_Code:
@@ -173,7 +176,7 @@ class BackupService:
                 src = os.path.join(settings.BASE_DIR, dir_name)
                 if os.path.exists(src):
                     dst = os.path.join(backup_dir, dir_name)
-                    shutil.copytree(src, dst, dirs_exist_ok=True)
+                    shutil.copytree(src, dst, dirs_exist_ok=True, copy_function=copy_file)
                     backup_items.append(dir_name)
             
             # Backup critical files
@@ -181,7 +184,7 @@ class BackupService:
             for file_name in critical_files:
                 src = os.path.join(settings.BASE_DIR, file_name)
                 if os.path.exists(src):
-                    shutil.copy2(src, os.path.join(backup_dir, file_name))
+                    copy_file(src, os.path.join(backup_dir, file_name))
                     backup_items.append(file_name)
         
         if backup.Has_Static:
@@ -189,7 +192,7 @@ class BackupService:
             static_dir = os.path.join(settings.BASE_DIR, 'static/')
             if os.path.exists(static_dir):
                 dst = os.path.join(backup_dir, 'static/')
-                shutil.copytree(static_dir, dst, dirs_exist_ok=True)
+                shutil.copytree(static_dir, dst, dirs_exist_ok=True, copy_function=copy_file)
                 backup_items.append('Static files')
         
         if backup.Has_Media:
@@ -197,7 +200,7 @@ class BackupService:
             media_dir = os.path.join(settings.BASE_DIR, 'media/')
             if os.path.exists(media_dir):
                 dst = os.path.join(backup_dir, 'media/')
-                shutil.copytree(media_dir, dst, dirs_exist_ok=True)
+                shutil.copytree(media_dir, dst, dirs_exist_ok=True, copy_function=copy_file)
                 backup_items.append('Media files')
         
         # Create backup info file
@@ -208,6 +211,9 @@ class BackupService:
             f.write(f"Created By: {backup.Created_By}\n")
             f.write(f"Backup Items: {', '.join(backup_items)}\n")
             f.write(f"Description: {backup.Description}\n")
+        bytes_written += os.path.getsize(info_file)
+        
+        return bytes_written
     
     def _restore_files(self, backup_path):
         """Restore files from backup"""
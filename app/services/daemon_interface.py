@@ -3,19 +3,29 @@ Daemon Interface Service
 Provides interface between Django admin and the update daemon
 """
 import os
+import sys
 import json
+import time
+import select
 import subprocess
 import logging
 from pathlib import Path
 from django.conf import settings
+from django.core.cache import cache
 from django.http import JsonResponse
+from app.models import SystemUpdate
 from app.services.update_daemon import (
     start_daemon, stop_daemon, is_daemon_running, 
-    get_daemon_status, get_update_progress
+    get_daemon_status, get_update_progress, notify_daemon
 )
 
 logger = logging.getLogger(__name__)
 
+# Short-lived cache for daemon state polled by the admin pages
+DAEMON_RUNNING_CACHE_KEY = 'daemon:running'
+DAEMON_STATUS_CACHE_KEY = 'daemon:status'
+DAEMON_STATE_CACHE_TIMEOUT = 2  # seconds
+
 class DaemonInterface:
     """
     Interface for communicating with the update daemon
@@ -25,6 +35,10 @@ class DaemonInterface:
         self.daemon_dir = Path(settings.BASE_DIR) / 'temp' / 'daemon'
         self.daemon_dir.mkdir(parents=True, exist_ok=True)
         
+    def invalidate_daemon_state(self):
+        """Drop cached daemon state after the daemon is started or stopped"""
+        cache.delete_many([DAEMON_RUNNING_CACHE_KEY, DAEMON_STATUS_CACHE_KEY])
+        
     def ensure_daemon_running(self):
         """Ensure the update daemon is running"""
         try:
@@ -33,15 +47,22 @@ class DaemonInterface:
                 
                 # Start daemon as subprocess
                 daemon_script = Path(__file__).parent / 'update_daemon.py'
-                subprocess.Popen([
-                    'python', str(daemon_script), 'start'
-                ], cwd=settings.BASE_DIR)
+                # Use this interpreter, don't inherit Django's fds, and detach
+                # from our session so the daemon outlives server restarts
+                process = subprocess.Popen(
+                    [sys.executable, str(daemon_script), 'start'],
+                    cwd=settings.BASE_DIR,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    close_fds=True,
+                    start_new_session=True,
+                )
                 
-                # Give it a moment to start
-                import time
-                time.sleep(2)
+                started = self._wait_for_daemon_start(process)
+                self.invalidate_daemon_state()
                 
-                if is_daemon_running():
+                if started:
                     logger.info("Update daemon started successfully")
                     return True
                 else:
@@ -55,6 +76,36 @@ class DaemonInterface:
             logger.error(f"Error ensuring daemon is running: {e}")
             return False
             
+    def _wait_for_daemon_start(self, process, timeout=5.0):
+        """Wait until the daemon reports running, returning early if it exits"""
+        # On Linux a pidfd becomes readable the moment the child exits
+        pidfd = None
+        if hasattr(os, 'pidfd_open'):
+            try:
+                pidfd = os.pidfd_open(process.pid)
+            except OSError:
+                pidfd = None
+        
+        deadline = time.monotonic() + timeout
+        try:
+            while time.monotonic() < deadline:
+                if is_daemon_running():
+                    return True
+                
+                if pidfd is not None:
+                    exited, _, _ = select.select([pidfd], [], [], 0.05)
+                    if exited:
+                        return False
+                else:
+                    if process.poll() is not None:
+                        return False
+                    time.sleep(0.05)
+            
+            return is_daemon_running()
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
+            
     def queue_update_installation(self, update):
         """Queue an update for installation by the daemon"""
         try:
@@ -68,6 +119,7 @@ class DaemonInterface:
             # Mark update for daemon processing
             update.Status = 'daemon_pending'
             update.save()
+            notify_daemon()
             
             logger.info(f"Queued update {update.Version_Number} for daemon processing")
             
@@ -91,9 +143,10 @@ class DaemonInterface:
             
             if not progress_data:
                 # Check if update exists in database
-                from app.models import SystemUpdate
                 try:
-                    update = SystemUpdate.objects.get(pk=update_id)
+                    update = SystemUpdate.objects.only(
+                        'Status', 'Progress', 'Error_Message'
+                    ).get(pk=update_id)
                     return {
                         'status': update.Status,
                         'progress': update.Progress or 0,
@@ -110,9 +163,10 @@ class DaemonInterface:
                 return progress_data
             else:
                 # Progress is for different update, check database
-                from app.models import SystemUpdate
                 try:
-                    update = SystemUpdate.objects.get(pk=update_id)
+                    update = SystemUpdate.objects.only(
+                        'Status', 'Progress', 'Error_Message'
+                    ).get(pk=update_id)
                     return {
                         'status': update.Status,
                         'progress': update.Progress or 0,
@@ -145,9 +199,8 @@ class DaemonInterface:
                 }
             else:
                 # Check database for logs
-                from app.models import SystemUpdate
                 try:
-                    update = SystemUpdate.objects.get(pk=update_id)
+                    update = SystemUpdate.objects.only('Installation_Log').get(pk=update_id)
                     return {
                         'status': 'success',
                         'logs': update.Installation_Log or 'No logs available'
@@ -169,8 +222,8 @@ class DaemonInterface:
     def get_daemon_info(self):
         """Get information about the daemon status"""
         try:
-            status = get_daemon_status()
-            running = is_daemon_running()
+            status = cache.get_or_set(DAEMON_STATUS_CACHE_KEY, get_daemon_status, DAEMON_STATE_CACHE_TIMEOUT)
+            running = cache.get_or_set(DAEMON_RUNNING_CACHE_KEY, is_daemon_running, DAEMON_STATE_CACHE_TIMEOUT)
             
             return {
                 'status': 'success',
@@ -191,7 +244,10 @@ class DaemonInterface:
     def stop_daemon_service(self):
         """Stop the update daemon"""
         try:
-            if stop_daemon():
+            stopped = stop_daemon()
+            self.invalidate_daemon_state()
+            
+            if stopped:
                 logger.info("Update daemon stopped successfully")
                 return {
                     'status': 'success',
@@ -219,10 +275,10 @@ class DaemonInterface:
                 return stop_result
                 
             # Wait a moment
-            import time
             time.sleep(2)
             
             # Start daemon
+            self.invalidate_daemon_state()
             if self.ensure_daemon_running():
                 logger.info("Update daemon restarted successfully")
                 return {
@@ -2,25 +2,194 @@
 Database Backup Service
 Handles database backup and restore operations
 """
+import io
 import os
 import json
 import gzip
+import logging
 import shutil
 import sqlite3
+import tempfile
 import subprocess
+from contextlib import contextmanager
 from datetime import datetime, timedelta
+from django.apps import apps
 from django.conf import settings
-from django.db import connection
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.constants import OnConflict
+from django.db.models.signals import post_migrate, post_save, pre_save
 from django.utils import timezone
 from django.core.management import call_command
-from io import StringIO
+from ..models import DatabaseBackup
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT when restoring through bulk_create
+RESTORE_BATCH_SIZE = 5000
+
+# Database alias that backups read from (falls back to the default one)
+BACKUP_DB_ALIAS = 'backup'
+
+_SIZE_NAMES = ("B", "KB", "MB", "GB", "TB")
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+GZIP_MAGIC = b'\x1f\x8b'
+SQLITE_MAGIC = b'SQLite format 3\x00'
+
+# Tables a SQLite file restore keeps from the live database instead of the
+# snapshot: backup records and sessions
+LIVE_TABLES = (DatabaseBackup._meta.db_table, 'django_session')
+
+
+def _open_compressed_writer(path):
+    """Open a text stream that writes a compressed backup (zstd when available)"""
+    if zstd is not None:
+        compressor = zstd.ZstdCompressor(level=3, threads=-1)
+        writer = compressor.stream_writer(open(path, 'wb'), closefd=True)
+        return io.TextIOWrapper(writer, encoding='utf-8')
+    return gzip.open(path, 'wt', encoding='utf-8')
+
+
+def _prepare_fixture(backup_path, work_dir):
+    """
+    Expose a backup file to loaddata under a name it can parse
+    
+    Backup files are named *.sql[.gz|.zst], which loaddata does not
+    recognise. Plain and gzip backups are symlinked as .json/.json.gz so
+    loaddata reads them in place; zstd backups (unsupported by loaddata)
+    are decompressed in chunks.
+    """
+    with open(backup_path, 'rb') as f:
+        magic = f.read(4)
+    
+    if magic == ZSTD_MAGIC:
+        if zstd is None:
+            raise Exception("The zstandard package is required to restore this backup")
+        fixture_path = os.path.join(work_dir, 'restore.json')
+        with open(backup_path, 'rb') as src, open(fixture_path, 'wb') as dst:
+            zstd.ZstdDecompressor().copy_stream(src, dst)
+        return fixture_path
+    
+    suffix = '.json.gz' if magic[:2] == GZIP_MAGIC else '.json'
+    fixture_path = os.path.join(work_dir, 'restore' + suffix)
+    try:
+        os.symlink(os.path.abspath(backup_path), fixture_path)
+    except OSError:
+        shutil.copyfile(backup_path, fixture_path)
+    return fixture_path
+
+
+def _open_backup_stream(path):
+    """Open a backup file for binary reading, detecting zstd/gzip compression"""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+    
+    if magic == ZSTD_MAGIC:
+        if zstd is None:
+            raise Exception("The zstandard package is required to restore this backup")
+        return zstd.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    if magic[:2] == GZIP_MAGIC:
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _compress_file(src_path, dst_path):
+    """Compress a file in chunks (zstd when available, gzip otherwise)"""
+    with open(src_path, 'rb') as src:
+        if zstd is not None:
+            with open(dst_path, 'wb') as dst:
+                zstd.ZstdCompressor(level=3, threads=-1).copy_stream(src, dst)
+        else:
+            with gzip.open(dst_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+
+
+def _is_sqlite_backup(path):
+    """Check whether a (possibly compressed) backup is a raw SQLite database file"""
+    with _open_backup_stream(path) as stream:
+        return stream.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+
+
+class _RecordCountingWriter:
+    """
+    File wrapper that counts serialized objects as dumpdata writes them
+    
+    Every object in a dumpdata JSON dump has exactly one "model" key, so
+    counting that key gives the record count without loading the dump.
+    The JSON encoder emits each key as a single write, but the colon after
+    it may arrive in a later write (Django's OutputWrapper also appends
+    newlines), so a match is only confirmed once the next non-whitespace
+    character is seen.
+    """
+    KEY = '"model"'
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.count = 0
+        self._pending = False
+    
+    def write(self, data):
+        if self._pending:
+            rest = data.lstrip()
+            if rest:
+                self._pending = False
+                if rest[0] == ':':
+                    self.count += 1
+        
+        # str.find is a C-level substring search; matches are rare
+        index = data.find(self.KEY)
+        while index != -1:
+            rest = data[index + len(self.KEY):index + len(self.KEY) + 16].lstrip()
+            if rest:
+                if rest[0] == ':':
+                    self.count += 1
+            else:
+                self._pending = True
+            index = data.find(self.KEY, index + len(self.KEY))
+        
+        return self.stream.write(data)
+    
+    def flush(self):
+        self.stream.flush()
+
+
+# App table names, read from sqlite_master once and reset after migrations
+_ALL_TABLES_CACHE = None
+_ALL_TABLES_LOCK = threading.Lock()
+
+
+def _invalidate_table_cache(**kwargs):
+    """Forget the cached table list when the schema may have changed"""
+    global _ALL_TABLES_CACHE
+    with _ALL_TABLES_LOCK:
+        _ALL_TABLES_CACHE = None
+
+
+post_migrate.connect(_invalidate_table_cache, dispatch_uid='database_backup_table_cache')
 
 
 class DatabaseBackupService:
     """Service class for handling database backup operations"""
     
+    # Minimum seconds between progress writes to the database
+    PROGRESS_SAVE_INTERVAL = 0.5
+    
     def __init__(self):
         self.backup_dir = os.path.join(settings.BASE_DIR, 'backups', 'database')
         self.ensure_backup_directory()
@@ -29,10 +198,25 @@ class DatabaseBackupService:
         """Ensure backup directory exists"""
         os.makedirs(self.backup_dir, exist_ok=True)
     
+    def _progress(self, backup_obj, operation, percentage, *extra_fields):
+        """
+        Record backup progress, writing it to the database at most every
+        PROGRESS_SAVE_INTERVAL seconds (always at 0% and 100%)
+        """
+        if operation is not None:
+            backup_obj.current_operation = operation
+        backup_obj.progress_percentage = percentage
+        
+        # Throttle state lives on the backup object since the service
+        # instance is shared between concurrent jobs
+        now = time.monotonic()
+        last_save = getattr(backup_obj, '_last_progress_save', 0)
+        if now - last_save >= self.PROGRESS_SAVE_INTERVAL or percentage in (0, 100):
+            backup_obj.save(update_fields=['current_operation', 'progress_percentage', *extra_fields])
+            backup_obj._last_progress_save = now
+    
     def create_backup(self, backup_obj, backup_type='full', tables=None):
         """Create a database backup"""
-        from ..models import DatabaseBackup
-        
         try:
             # Update backup status
             backup_obj.status = 'running'
@@ -42,16 +226,21 @@ class DatabaseBackupService:
             
             # Generate backup filename
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"{backup_type}_backup_{timestamp}.sql"
+            # Full SQLite backups are a page-level copy of the database file
+            sqlite_copy = backup_type == 'full' and connection.vendor == 'sqlite'
+            extension = 'sqlite3' if sqlite_copy else 'sql'
+            filename = f"{backup_type}_backup_{timestamp}.{extension}"
             if backup_obj.compressed:
-                filename += '.gz'
+                filename += '.zst' if zstd is not None else '.gz'
             
             backup_path = os.path.join(self.backup_dir, filename)
             backup_obj.file_path = backup_path
             backup_obj.save()
             
             # Perform backup based on type
-            if backup_type == 'full':
+            if sqlite_copy:
+                self._create_sqlite_backup(backup_obj, backup_path)
+            elif backup_type == 'full':
                 self._create_full_backup(backup_obj, backup_path)
             elif backup_type == 'clients':
                 self._create_clients_backup(backup_obj, backup_path)
@@ -83,28 +272,53 @@ class DatabaseBackupService:
     
     def _create_full_backup(self, backup_obj, backup_path):
         """Create full database backup"""
-        backup_obj.current_operation = 'Creating full database backup...'
-        backup_obj.progress_percentage = 10
-        backup_obj.save()
+        self._progress(backup_obj, 'Creating full database backup...', 10)
         
         # Get all tables
         tables = self._get_all_tables()
         backup_obj.tables_included = ', '.join(tables)
-        backup_obj.progress_percentage = 20
-        backup_obj.save()
+        self._progress(backup_obj, None, 20, 'tables_included')
         
         # Create backup using Django's dumpdata
-        backup_obj.current_operation = 'Exporting data...'
-        backup_obj.progress_percentage = 30
-        backup_obj.save()
+        self._progress(backup_obj, 'Exporting data...', 30)
         
         self._export_data(backup_obj, backup_path, None)
     
+    def _create_sqlite_backup(self, backup_obj, backup_path):
+        """Create full backup with SQLite's online backup API"""
+        self._progress(backup_obj, 'Creating full database backup...', 10)
+        
+        tables = self._get_all_tables()
+        backup_obj.tables_included = ', '.join(tables)
+        self._progress(backup_obj, 'Copying database pages...', 30, 'tables_included')
+        
+        # Copy in a single step: writes from other connections during a
+        # stepped copy would restart it, including our own progress saves
+        raw_path = backup_path + '.tmp' if backup_obj.compressed else backup_path
+        source = sqlite3.connect(settings.DATABASES['default']['NAME'])
+        target = sqlite3.connect(raw_path)
+        try:
+            source.backup(target)
+            backup_obj.records_count = sum(
+                target.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+                for table in tables
+            )
+        finally:
+            source.close()
+            target.close()
+        
+        if backup_obj.compressed:
+            self._progress(backup_obj, 'Compressing backup...', 70, 'records_count')
+            try:
+                _compress_file(raw_path, backup_path)
+            finally:
+                os.remove(raw_path)
+        
+        self._progress(backup_obj, 'Finalizing backup...', 90, 'records_count')
+    
     def _create_clients_backup(self, backup_obj, backup_path):
         """Create backup of client-related data only"""
-        backup_obj.current_operation = 'Creating clients data backup...'
-        backup_obj.progress_percentage = 10
-        backup_obj.save()
+        self._progress(backup_obj, 'Creating clients data backup...', 10)
         
         # Client-related tables
         client_tables = [
@@ -120,16 +334,13 @@ class DatabaseBackupService:
         ]
         
         backup_obj.tables_included = ', '.join(client_tables)
-        backup_obj.progress_percentage = 30
-        backup_obj.save()
+        self._progress(backup_obj, None, 30, 'tables_included')
         
         self._export_data(backup_obj, backup_path, client_tables)
     
     def _create_settings_backup(self, backup_obj, backup_path):
         """Create backup of system settings only"""
-        backup_obj.current_operation = 'Creating settings backup...'
-        backup_obj.progress_percentage = 10
-        backup_obj.save()
+        self._progress(backup_obj, 'Creating settings backup...', 10)
         
         # System settings tables
         settings_tables = [
@@ -146,120 +357,139 @@ class DatabaseBackupService:
         ]
         
         backup_obj.tables_included = ', '.join(settings_tables)
-        backup_obj.progress_percentage = 30
-        backup_obj.save()
+        self._progress(backup_obj, None, 30, 'tables_included')
         
         self._export_data(backup_obj, backup_path, settings_tables)
     
     def _create_custom_backup(self, backup_obj, backup_path, tables):
         """Create backup of custom selected tables"""
-        backup_obj.current_operation = 'Creating custom backup...'
-        backup_obj.progress_percentage = 10
-        backup_obj.save()
+        self._progress(backup_obj, 'Creating custom backup...', 10)
         
         if tables:
             backup_obj.tables_included = ', '.join(tables)
-        backup_obj.progress_percentage = 30
-        backup_obj.save()
+        self._progress(backup_obj, None, 30, 'tables_included')
         
         self._export_data(backup_obj, backup_path, tables)
     
     def _export_data(self, backup_obj, backup_path, tables=None):
         """Export data using Django's dumpdata command"""
-        backup_obj.current_operation = 'Serializing data...'
-        backup_obj.progress_percentage = 50
-        backup_obj.save()
+        self._progress(backup_obj, 'Serializing data...', 50)
         
         try:
-            # Capture dumpdata output
-            output = StringIO()
-            
-            if tables:
-                # Export specific tables
-                call_command('dumpdata', *tables, stdout=output, indent=2)
+            # Stream dumpdata straight into the backup file, counting
+            # serialized objects on the way instead of re-parsing the dump
+            if backup_obj.compressed:
+                backup_file = _open_compressed_writer(backup_path)
             else:
-                # Export all data except sessions and contenttypes
-                call_command('dumpdata', 
-                           '--exclude=sessions',
-                           '--exclude=contenttypes',
-                           '--exclude=admin.LogEntry',
-                           stdout=output, indent=2)
-            
-            backup_obj.current_operation = 'Writing backup file...'
-            backup_obj.progress_percentage = 70
-            backup_obj.save()
-            
-            # Get the data
-            data = output.getvalue()
-            output.close()
+                backup_file = open(backup_path, 'w', encoding='utf-8')
             
-            # Count records
-            import json
-            try:
-                json_data = json.loads(data)
-                backup_obj.records_count = len(json_data)
-            except:
-                backup_obj.records_count = 0
-            
-            backup_obj.progress_percentage = 80
-            backup_obj.save()
+            alias = BACKUP_DB_ALIAS if BACKUP_DB_ALIAS in settings.DATABASES else DEFAULT_DB_ALIAS
             
-            # Write to file (compressed or uncompressed)
-            if backup_obj.compressed:
-                with gzip.open(backup_path, 'wt', encoding='utf-8') as f:
-                    f.write(data)
-            else:
-                with open(backup_path, 'w', encoding='utf-8') as f:
-                    f.write(data)
+            with backup_file, self._read_snapshot(alias):
+                if tables:
+                    # Export specific tables
+                    backup_obj.records_count = self._export_models(backup_file, tables, alias)
+                else:
+                    # Export all data except sessions and contenttypes
+                    output = _RecordCountingWriter(backup_file)
+                    call_command('dumpdata', 
+                               '--exclude=sessions',
+                               '--exclude=contenttypes',
+                               '--exclude=admin.LogEntry',
+                               f'--database={alias}',
+                               stdout=output, indent=2)
+                    backup_obj.records_count = output.count
             
-            backup_obj.current_operation = 'Finalizing backup...'
-            backup_obj.progress_percentage = 90
-            backup_obj.save()
+            self._progress(backup_obj, 'Finalizing backup...', 90, 'records_count')
             
         except Exception as e:
             raise Exception(f"Error during data export: {str(e)}")
     
+    @contextmanager
+    def _read_snapshot(self, alias):
+        """
+        Hold one read transaction on the given connection for the whole
+        export so every table is read from the same snapshot
+        
+        Only done for SQLite in WAL mode, where readers don't block writers;
+        in rollback-journal mode a long read transaction would lock out
+        every write, so the export keeps reading in autocommit.
+        """
+        conn = connections[alias]
+        try:
+            pin_snapshot = True
+            if conn.vendor == 'sqlite':
+                with conn.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    pin_snapshot = cursor.fetchone()[0].lower() == 'wal'
+            
+            if pin_snapshot:
+                with transaction.atomic(using=alias):
+                    yield
+            else:
+                yield
+        finally:
+            if alias != DEFAULT_DB_ALIAS:
+                conn.close()
+    
+    def _export_models(self, stream, labels, alias=DEFAULT_DB_ALIAS):
+        """
+        Serialize the given models ("app" or "app.model" labels) straight to
+        stream as a single JSON fixture, reading rows in chunks
+        
+        Returns the number of objects written.
+        """
+        models = []
+        for label in labels:
+            if '.' in label:
+                models.append(apps.get_model(label))
+            else:
+                models.extend(apps.get_app_config(label).get_models())
+        
+        count = 0
+        
+        def objects():
+            nonlocal count
+            for model in models:
+                queryset = model._default_manager.using(alias).order_by(model._meta.pk.name)
+                for obj in queryset.iterator(chunk_size=2000):
+                    count += 1
+                    yield obj
+        
+        serializers.serialize('json', objects(), stream=stream, indent=2)
+        return count
+    
     def restore_backup(self, backup_obj):
         """Restore from a backup file"""
         try:
-            backup_obj.current_operation = 'Starting restore...'
-            backup_obj.progress_percentage = 0
-            backup_obj.save()
+            self._progress(backup_obj, 'Starting restore...', 0)
             
             if not os.path.exists(backup_obj.file_path):
                 raise Exception("Backup file not found")
             
-            backup_obj.current_operation = 'Reading backup file...'
-            backup_obj.progress_percentage = 20
-            backup_obj.save()
-            
-            # Read backup file
-            if backup_obj.compressed:
-                with gzip.open(backup_obj.file_path, 'rt', encoding='utf-8') as f:
-                    data = f.read()
-            else:
-                with open(backup_obj.file_path, 'r', encoding='utf-8') as f:
-                    data = f.read()
-            
-            backup_obj.current_operation = 'Restoring data...'
-            backup_obj.progress_percentage = 50
-            backup_obj.save()
-            
-            # Create temporary file for loaddata
-            temp_file = backup_obj.file_path + '.temp.json'
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                f.write(data)
+            self._progress(backup_obj, 'Loading data into database...', 50)
             
-            backup_obj.current_operation = 'Loading data into database...'
-            backup_obj.progress_percentage = 70
-            backup_obj.save()
-            
-            # Load data using Django's loaddata
-            call_command('loaddata', temp_file)
+            restored = False
+            if _is_sqlite_backup(backup_obj.file_path):
+                self._restore_sqlite_backup(backup_obj.file_path)
+                restored = True
+            elif connection.features.supports_update_conflicts_with_target:
+                try:
+                    self._bulk_restore(backup_obj.file_path)
+                    restored = True
+                except Exception as e:
+                    logger.warning(f"Bulk restore failed, falling back to loaddata: {e}")
             
-            # Clean up temp file
-            os.remove(temp_file)
+            if not restored:
+                # Load data using Django's loaddata straight from the backup file
+                work_dir = tempfile.mkdtemp(dir=self.backup_dir)
+                try:
+                    fixture_path = _prepare_fixture(backup_obj.file_path, work_dir)
+                    call_command('loaddata', fixture_path)
+                finally:
+                    shutil.rmtree(work_dir, ignore_errors=True)
             
+            # Full save: the restored tables may not contain this row yet
             backup_obj.current_operation = 'Restore completed'
             backup_obj.progress_percentage = 100
             backup_obj.save()
@@ -271,104 +501,266 @@ class DatabaseBackupService:
             backup_obj.save()
             return False, str(e)
     
+    def _restore_sqlite_backup(self, backup_path):
+        """
+        Copy a SQLite file backup over the live database
+        
+        Unlike the JSON restore this rewinds every table to the snapshot,
+        except for the tables in LIVE_TABLES: backup records (including the
+        running restore's own row) and sessions are carried over from the
+        live database first, so newer backup files aren't orphaned and
+        admins stay logged in. Other connections block on the database lock
+        while the pages are copied and see the restored data afterwards.
+        """
+        work_dir = tempfile.mkdtemp(dir=self.backup_dir)
+        try:
+            raw_path = os.path.join(work_dir, 'restore.sqlite3')
+            with _open_backup_stream(backup_path) as src, open(raw_path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            
+            # Drop Django's handle so it reconnects to the restored data
+            connection.close()
+            live_path = settings.DATABASES['default']['NAME']
+            source = sqlite3.connect(raw_path)
+            try:
+                self._carry_over_live_tables(source, live_path)
+                target = sqlite3.connect(live_path)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+            finally:
+                source.close()
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def _carry_over_live_tables(self, snapshot, live_path):
+        """Replace LIVE_TABLES in the snapshot connection with the live rows"""
+        snapshot.execute('ATTACH DATABASE ? AS live', (live_path,))
+        try:
+            with snapshot:
+                for table in LIVE_TABLES:
+                    columns = ', '.join(
+                        f'"{row[1]}"' for row in snapshot.execute(f'PRAGMA live.table_info("{table}")')
+                    )
+                    if not columns:
+                        continue
+                    snapshot.execute(f'DELETE FROM main."{table}"')
+                    snapshot.execute(
+                        f'INSERT INTO main."{table}" ({columns}) SELECT {columns} FROM live."{table}"'
+                    )
+        finally:
+            snapshot.execute('DETACH DATABASE live')
+    
+    def _bulk_restore(self, backup_path):
+        """
+        Restore a backup with batched upserts instead of one save() per row
+        
+        Objects are grouped by model and inserted raw, like loaddata does,
+        with ON CONFLICT (pk) DO UPDATE so existing rows are overwritten
+        and auto_now/auto_now_add timestamps keep their backed-up values.
+        Objects carrying many-to-many data or forward references, and
+        models with pre/post_save receivers, go through the regular
+        deserializer save() so they behave exactly as under loaddata.
+        Everything runs in one transaction with foreign key checks
+        deferred to commit.
+        """
+        loaded_models = set()
+        deferred = []
+        batch = []
+        
+        def flush():
+            if not batch:
+                return
+            model = type(batch[0])
+            opts = model._meta
+            fields = opts.concrete_fields
+            update_fields = [f for f in fields if not f.primary_key]
+            on_conflict = OnConflict.UPDATE if update_fields else OnConflict.IGNORE
+            batch_size = min(RESTORE_BATCH_SIZE, connection.ops.bulk_batch_size(fields, batch) or RESTORE_BATCH_SIZE)
+            
+            # raw=True skips Field.pre_save(), which bulk_create would use to
+            # overwrite auto_now/auto_now_add fields with the current time
+            for start in range(0, len(batch), batch_size):
+                model._base_manager._insert(
+                    batch[start:start + batch_size],
+                    fields=fields,
+                    raw=True,
+                    using=connection.alias,
+                    on_conflict=on_conflict,
+                    update_fields=update_fields or None,
+                    unique_fields=[opts.pk] if update_fields else None,
+                )
+            loaded_models.add(model)
+            batch.clear()
+        
+        def has_save_receivers(model):
+            return pre_save.has_listeners(model) or post_save.has_listeners(model)
+        
+        with _open_backup_stream(backup_path) as stream, transaction.atomic():
+            if connection.vendor == 'sqlite':
+                with connection.cursor() as cursor:
+                    cursor.execute('PRAGMA defer_foreign_keys=ON')
+            
+            # Stream-parse the fixture when ijson is available
+            if ijson is not None:
+                records = ijson.items(stream, 'item', use_float=True)
+            else:
+                records = json.load(stream)
+            
+            for deserialized in serializers.deserialize('python', records, handle_forward_references=True):
+                obj = deserialized.object
+                
+                if deserialized.m2m_data or deserialized.deferred_fields or has_save_receivers(type(obj)):
+                    flush()
+                    deserialized.save()
+                    loaded_models.add(type(obj))
+                    if deserialized.deferred_fields:
+                        deferred.append(deserialized)
+                    continue
+                
+                if batch and type(batch[0]) is not type(obj):
+                    flush()
+                batch.append(obj)
+                if len(batch) >= RESTORE_BATCH_SIZE:
+                    flush()
+            flush()
+            
+            # Resolve forward references once every object exists
+            for deserialized in deferred:
+                deserialized.save_deferred_fields()
+            
+            # Keep auto-increment sequences ahead of restored primary keys
+            sequence_sql = connection.ops.sequence_reset_sql(no_style(), loaded_models)
+            if sequence_sql:
+                with connection.cursor() as cursor:
+                    for sql in sequence_sql:
+                        cursor.execute(sql)
+    
     def cleanup_old_backups(self, max_count=10, retention_days=30):
         """Clean up old backup files"""
-        from ..models import DatabaseBackup
-        
-        # Delete old backup records and files
+        # Delete old backup records in one query, then their files
         cutoff_date = timezone.now() - timedelta(days=retention_days)
         old_backups = DatabaseBackup.objects.filter(created_at__lt=cutoff_date)
+        file_paths = list(old_backups.values_list('file_path', flat=True))
+        old_backups.delete()
+        
+        # Keep only the most recent backups: find the creation time of the
+        # Nth newest and drop everything older than it
+        if max_count > 0:
+            cutoff = DatabaseBackup.objects.order_by('-created_at').values_list(
+                'created_at', flat=True
+            )[max_count - 1:max_count].first()
+            if cutoff:
+                excess_backups = DatabaseBackup.objects.filter(created_at__lt=cutoff)
+                file_paths.extend(excess_backups.values_list('file_path', flat=True))
+                excess_backups.delete()
         
-        for backup in old_backups:
-            if backup.file_path and os.path.exists(backup.file_path):
+        self._remove_backup_files(file_paths)
+    
+    def _remove_backup_files(self, file_paths):
+        """Delete backup files in parallel"""
+        def remove(path):
+            if path:
                 try:
-                    os.remove(backup.file_path)
-                except:
+                    os.unlink(path)
+                except FileNotFoundError:
                     pass
-            backup.delete()
+                except OSError as e:
+                    logger.warning(f"Failed to remove backup file {path}: {e}")
         
-        # Keep only the most recent backups
-        if max_count > 0:
-            excess_backups = DatabaseBackup.objects.all()[max_count:]
-            for backup in excess_backups:
-                if backup.file_path and os.path.exists(backup.file_path):
-                    try:
-                        os.remove(backup.file_path)
-                    except:
-                        pass
-                backup.delete()
+        if file_paths:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(remove, file_paths))
     
     def _get_all_tables(self):
-        """Get list of all database tables"""
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = [row[0] for row in cursor.fetchall()]
-            # Filter out Django system tables
-            app_tables = [table for table in tables if table.startswith('app_')]
-            return app_tables
+        """Get list of all database tables (cached until the next migration)"""
+        global _ALL_TABLES_CACHE
+        
+        with _ALL_TABLES_LOCK:
+            if _ALL_TABLES_CACHE is None:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+                    tables = [row[0] for row in cursor.fetchall()]
+                # Filter out Django system tables
+                _ALL_TABLES_CACHE = [table for table in tables if table.startswith('app_')]
+            return list(_ALL_TABLES_CACHE)
     
     def get_backup_statistics(self):
         """Get backup statistics"""
-        from ..models import DatabaseBackup
-        
-        total_backups = DatabaseBackup.objects.count()
-        completed_backups = DatabaseBackup.objects.filter(status='completed').count()
-        failed_backups = DatabaseBackup.objects.filter(status='failed').count()
-        
-        # Calculate total backup size
-        completed = DatabaseBackup.objects.filter(status='completed')
-        total_size = sum([backup.file_size for backup in completed])
+        # Counts and total size in a single aggregate query
+        stats = DatabaseBackup.objects.aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='completed')),
+            failed=Count('id', filter=Q(status='failed')),
+            total_size=Sum('file_size', filter=Q(status='completed')),
+        )
+        total_size = stats['total_size'] or 0
         
         return {
-            'total_backups': total_backups,
-            'completed_backups': completed_backups,
-            'failed_backups': failed_backups,
+            'total_backups': stats['total'],
+            'completed_backups': stats['completed'],
+            'failed_backups': stats['failed'],
             'total_size': total_size,
             'total_size_display': self._format_file_size(total_size)
         }
     
     def _format_file_size(self, size_bytes):
         """Format file size in human readable format"""
-        if size_bytes == 0:
+        if not size_bytes:
             return "0 B"
         
-        size_names = ["B", "KB", "MB", "GB", "TB"]
-        import math
-        i = int(math.floor(math.log(size_bytes, 1024)))
-        p = math.pow(1024, i)
-        s = round(size_bytes / p, 2)
-        return f"{s} {size_names[i]}"
+        i = 0
+        size = float(size_bytes)
+        while size >= 1024 and i < len(_SIZE_NAMES) - 1:
+            size /= 1024
+            i += 1
+        return f"{round(size, 2)} {_SIZE_NAMES[i]}"
+
+
+# Global service instance
+database_backup_service = DatabaseBackupService()
+
+
+def _celery_enabled():
+    """Check whether backups should be dispatched to Celery workers"""
+    from ..tasks import run_backup
+    return run_backup is not None and bool(getattr(settings, 'CELERY_BROKER_URL', ''))
 
 
 def run_backup_async(backup_id, backup_type='full', tables=None):
     """Run backup operation asynchronously"""
-    from ..models import DatabaseBackup
+    if _celery_enabled():
+        from ..tasks import run_backup
+        run_backup.delay(backup_id, backup_type, tables)
+        return
     
     def backup_thread():
         try:
             backup_obj = DatabaseBackup.objects.get(id=backup_id)
-            service = DatabaseBackupService()
-            service.create_backup(backup_obj, backup_type, tables)
+            database_backup_service.create_backup(backup_obj, backup_type, tables)
         except Exception as e:
             print(f"Backup thread error: {e}")
     
-    thread = threading.Thread(target=backup_thread)
-    thread.daemon = True
+    # Non-daemon, so the interpreter waits for it at exit instead of
+    # cutting the backup file off mid-write
+    thread = threading.Thread(target=backup_thread, name=f'DatabaseBackup-{backup_id}')
     thread.start()
 
 
 def run_restore_async(backup_id):
     """Run restore operation asynchronously"""
-    from ..models import DatabaseBackup
+    if _celery_enabled():
+        from ..tasks import run_restore
+        run_restore.delay(backup_id)
+        return
     
     def restore_thread():
         try:
             backup_obj = DatabaseBackup.objects.get(id=backup_id)
-            service = DatabaseBackupService()
-            service.restore_backup(backup_obj)
+            database_backup_service.restore_backup(backup_obj)
         except Exception as e:
             print(f"Restore thread error: {e}")
     
-    thread = threading.Thread(target=restore_thread)
-    thread.daemon = True
-    thread.start()
\ No newline at end of file
+    thread = threading.Thread(target=restore_thread, name=f'DatabaseRestore-{backup_id}')
+    thread.start()
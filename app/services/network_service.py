@@ -3,6 +3,10 @@ Network Configuration Service
 Handles VLAN and USB-to-LAN mode switching
 """
 import os
+import json
+import time
+import tempfile
+import threading
 import subprocess
 import logging
 from django.conf import settings
@@ -10,6 +14,156 @@ from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Seconds to reuse interface detection and status results
+INTERFACE_CACHE_TTL = 30
+NETWORK_STATUS_CACHE_TTL = 5
+
+# Cached `ip` results shared by all service instances: key -> (timestamp, value)
+_interface_cache = {}
+_interface_cache_lock = threading.Lock()
+
+# Detached network restart started by restart_network_services, until it exits
+_network_restart_process = None
+
+
+def _network_restart_running():
+    """
+    Whether a network restart is still in flight; once it has exited the
+    cache is dropped so the next read sees the restarted interfaces
+    """
+    global _network_restart_process
+    with _interface_cache_lock:
+        if _network_restart_process is None:
+            return False
+        if _network_restart_process.poll() is None:
+            return True
+        _network_restart_process = None
+        _interface_cache.clear()
+        return False
+
+
+def _get_cached(key, ttl, loader, is_valid):
+    """Return a cached result younger than ttl, otherwise reload it"""
+    # Interface state is in flux during a restart, so don't cache it
+    if _network_restart_running():
+        return loader()
+    
+    with _interface_cache_lock:
+        entry = _interface_cache.get(key)
+    if entry and time.monotonic() - entry[0] < ttl:
+        return entry[1]
+    
+    value = loader()
+    if is_valid(value):
+        with _interface_cache_lock:
+            _interface_cache[key] = (time.monotonic(), value)
+    return value
+
+
+# Valid 802.1Q VLAN IDs (0 and 4095 are reserved)
+VLAN_ID_RANGE = range(1, 4095)
+
+# Shell sequence run detached by restart_network_services
+RESTART_NETWORK_SCRIPT = (
+    'sudo systemctl stop hostapd dnsmasq; '
+    'sudo systemctl restart networking && '
+    'sudo systemctl start dnsmasq hostapd'
+)
+
+# apt package lists younger than this are reused instead of running apt-get update
+APT_LISTS_DIR = '/var/lib/apt/lists'
+APT_LISTS_MAX_AGE = 3600
+
+# Marker recording the boot on which VLAN prerequisites were last satisfied
+BOOT_ID_FILE = '/proc/sys/kernel/random/boot_id'
+_vlan_prerequisites_ok = False
+
+
+def _current_boot_id():
+    """Kernel boot id, changes on every reboot"""
+    try:
+        with open(BOOT_ID_FILE, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def invalidate_interface_cache():
+    """Drop cached interface data after the network configuration changes"""
+    with _interface_cache_lock:
+        _interface_cache.clear()
+
+
+# Config file templates, filled in with str.format
+_VLAN_INTERFACES_TEMPLATE = """# Network configuration for VLAN mode
+# Generated automatically - do not edit manually
+
+auto lo
+iface lo inet loopback
+
+# Ethernet interface for VLAN
+auto {eth_interface}
+iface {eth_interface} inet manual
+
+# VLAN interface
+auto {eth_interface}.{vlan_id}
+iface {eth_interface}.{vlan_id} inet dhcp
+    vlan-raw-device {eth_interface}
+
+# USB WiFi interface for hotspot
+auto {usb_interface}
+iface {usb_interface} inet static
+    address 192.168.4.1
+    netmask 255.255.255.0
+    network 192.168.4.0
+    broadcast 192.168.4.255
+"""
+
+_USB_TO_LAN_INTERFACES_TEMPLATE = """# Network configuration for USB-to-LAN mode
+# Generated automatically - do not edit manually
+
+auto lo
+iface lo inet loopback
+
+# Ethernet interface for WAN
+auto {eth_interface}
+iface {eth_interface} inet dhcp
+
+# USB WiFi interface for hotspot
+auto {usb_interface}
+iface {usb_interface} inet static
+    address 192.168.4.1
+    netmask 255.255.255.0
+    network 192.168.4.0
+    broadcast 192.168.4.255
+"""
+
+_HOSTAPD_VLAN_TEMPLATE = """# Hostapd configuration for VLAN mode
+interface={usb_interface}
+driver=nl80211
+ssid=PisoWiFi-VLAN{vlan_id}
+hw_mode=g
+channel=7
+wmm_enabled=0
+macaddr_acl=0
+auth_algs=1
+ignore_broadcast_ssid=0
+wpa=0
+"""
+
+_HOSTAPD_USB_TEMPLATE = """# Hostapd configuration for USB-to-LAN mode
+interface={usb_interface}
+driver=nl80211
+ssid=PisoWiFi
+hw_mode=g
+channel=7
+wmm_enabled=0
+macaddr_acl=0
+auth_algs=1
+ignore_broadcast_ssid=0
+wpa=0
+"""
+
 
 class NetworkConfigurationService:
     """Service for handling network mode configuration"""
@@ -19,9 +173,13 @@ class NetworkConfigurationService:
         self.interfaces_file = '/etc/network/interfaces'
         self.dhcpcd_conf = '/etc/dhcpcd.conf'
         self.hostapd_conf = '/etc/hostapd/hostapd.conf'
+        self.vlan_marker_file = os.path.join(settings.BASE_DIR, 'temp', 'vlan_prerequisites.ok')
+        # Set when apply_network_mode actually rewrote a config file
+        self.config_changed = False
         
     def apply_network_mode(self, vlan_settings):
         """Apply network configuration based on VLAN settings"""
+        self.config_changed = False
         try:
             # Pre-flight checks for VLAN compatibility
             if vlan_settings.network_mode == 'vlan':
@@ -59,6 +217,8 @@ class NetworkConfigurationService:
         vlan_settings.last_mode_change = timezone.now()
         vlan_settings.save()
         
+        invalidate_interface_cache()
+        
         return True, f"VLAN mode configured successfully with VLAN ID {vlan_settings.vlan_id}"
     
     def _configure_usb_to_lan_mode(self, vlan_settings):
@@ -83,72 +243,38 @@ class NetworkConfigurationService:
         vlan_settings.last_mode_change = timezone.now()
         vlan_settings.save()
         
+        invalidate_interface_cache()
+        
         return True, "USB-to-LAN mode configured successfully"
     
     def _generate_vlan_config(self, vlan_settings):
         """Generate network configuration for VLAN mode"""
-        config = f"""# Network configuration for VLAN mode
-# Generated automatically - do not edit manually
-
-auto lo
-iface lo inet loopback
-
-# Ethernet interface for VLAN
-auto {vlan_settings.eth_interface}
-iface {vlan_settings.eth_interface} inet manual
-
-# VLAN interface
-auto {vlan_settings.eth_interface}.{vlan_settings.vlan_id}
-iface {vlan_settings.eth_interface}.{vlan_settings.vlan_id} inet dhcp
-    vlan-raw-device {vlan_settings.eth_interface}
-
-# USB WiFi interface for hotspot
-auto {vlan_settings.usb_interface}
-iface {vlan_settings.usb_interface} inet static
-    address 192.168.4.1
-    netmask 255.255.255.0
-    network 192.168.4.0
-    broadcast 192.168.4.255
-"""
-        return config
+        return _VLAN_INTERFACES_TEMPLATE.format(
+            eth_interface=vlan_settings.eth_interface,
+            vlan_id=vlan_settings.vlan_id,
+            usb_interface=vlan_settings.usb_interface,
+        )
     
     def _generate_usb_to_lan_config(self, vlan_settings):
         """Generate network configuration for USB-to-LAN mode"""
-        config = f"""# Network configuration for USB-to-LAN mode
-# Generated automatically - do not edit manually
-
-auto lo
-iface lo inet loopback
-
-# Ethernet interface for WAN
-auto {vlan_settings.eth_interface}
-iface {vlan_settings.eth_interface} inet dhcp
-
-# USB WiFi interface for hotspot
-auto {vlan_settings.usb_interface}
-iface {vlan_settings.usb_interface} inet static
-    address 192.168.4.1
-    netmask 255.255.255.0
-    network 192.168.4.0
-    broadcast 192.168.4.255
-"""
-        return config
+        return _USB_TO_LAN_INTERFACES_TEMPLATE.format(
+            eth_interface=vlan_settings.eth_interface,
+            usb_interface=vlan_settings.usb_interface,
+        )
     
     def _update_network_interfaces(self, config):
         """Update /etc/network/interfaces file"""
         try:
+            if self._is_current(self.interfaces_file, config):
+                logger.info("Network interfaces already up to date")
+                return True
+            
             # Backup current configuration
-            backup_file = f"{self.interfaces_file}.backup.{timezone.now().strftime('%Y%m%d_%H%M%S')}"
-            if os.path.exists(self.interfaces_file):
-                subprocess.run(['sudo', 'cp', self.interfaces_file, backup_file], check=True)
+            self._backup_file(self.interfaces_file)
             
             # Write new configuration
-            with open('/tmp/interfaces_new', 'w') as f:
-                f.write(config)
-            
-            # Move to final location with sudo
-            subprocess.run(['sudo', 'mv', '/tmp/interfaces_new', self.interfaces_file], check=True)
-            subprocess.run(['sudo', 'chmod', '644', self.interfaces_file], check=True)
+            self._install_file(self.interfaces_file, config)
+            self.config_changed = True
             
             logger.info("Network interfaces updated successfully")
             return True
@@ -160,24 +286,17 @@ iface {vlan_settings.usb_interface} inet static
     def _update_hostapd_vlan_config(self, vlan_settings):
         """Update hostapd configuration for VLAN mode"""
         try:
-            config = f"""# Hostapd configuration for VLAN mode
-interface={vlan_settings.usb_interface}
-driver=nl80211
-ssid=PisoWiFi-VLAN{vlan_settings.vlan_id}
-hw_mode=g
-channel=7
-wmm_enabled=0
-macaddr_acl=0
-auth_algs=1
-ignore_broadcast_ssid=0
-wpa=0
-"""
+            config = _HOSTAPD_VLAN_TEMPLATE.format(
+                usb_interface=vlan_settings.usb_interface,
+                vlan_id=vlan_settings.vlan_id,
+            )
             
-            with open('/tmp/hostapd_new', 'w') as f:
-                f.write(config)
+            if self._is_current(self.hostapd_conf, config):
+                logger.info("Hostapd configuration already up to date")
+                return True
             
-            subprocess.run(['sudo', 'mv', '/tmp/hostapd_new', self.hostapd_conf], check=True)
-            subprocess.run(['sudo', 'chmod', '644', self.hostapd_conf], check=True)
+            self._install_file(self.hostapd_conf, config)
+            self.config_changed = True
             
             logger.info("Hostapd VLAN configuration updated")
             return True
@@ -189,24 +308,16 @@ wpa=0
     def _update_hostapd_usb_config(self, vlan_settings):
         """Update hostapd configuration for USB-to-LAN mode"""
         try:
-            config = f"""# Hostapd configuration for USB-to-LAN mode
-interface={vlan_settings.usb_interface}
-driver=nl80211
-ssid=PisoWiFi
-hw_mode=g
-channel=7
-wmm_enabled=0
-macaddr_acl=0
-auth_algs=1
-ignore_broadcast_ssid=0
-wpa=0
-"""
+            config = _HOSTAPD_USB_TEMPLATE.format(
+                usb_interface=vlan_settings.usb_interface,
+            )
             
-            with open('/tmp/hostapd_new', 'w') as f:
-                f.write(config)
+            if self._is_current(self.hostapd_conf, config):
+                logger.info("Hostapd configuration already up to date")
+                return True
             
-            subprocess.run(['sudo', 'mv', '/tmp/hostapd_new', self.hostapd_conf], check=True)
-            subprocess.run(['sudo', 'chmod', '644', self.hostapd_conf], check=True)
+            self._install_file(self.hostapd_conf, config)
+            self.config_changed = True
             
             logger.info("Hostapd USB configuration updated")
             return True
@@ -215,23 +326,85 @@ wpa=0
             logger.error(f"Error updating hostapd USB config: {e}")
             return False
     
+    def _backup_file(self, path):
+        """
+        Keep a timestamped backup of a config file as a hardlink
+        
+        The new config is installed as a fresh inode, so the link keeps the
+        old contents without copying them. A missing file is not an error.
+        """
+        backup_file = f"{path}.backup.{timezone.now().strftime('%Y%m%d_%H%M%S')}"
+        result = subprocess.run(['sudo', 'ln', '-f', path, backup_file],
+                              capture_output=True, check=False)
+        if result.returncode != 0 and os.path.exists(path):
+            # Hardlinks can be refused (e.g. across filesystems), copy instead
+            subprocess.run(['sudo', 'cp', path, backup_file], check=True)
+    
+    def _is_current(self, path, content):
+        """Check whether a config file already holds exactly this content"""
+        try:
+            with open(path, 'r') as f:
+                return f.read() == content
+        except OSError:
+            return False
+    
+    def _install_file(self, dst, content, mode=0o644):
+        """
+        Atomically replace a config file with the given content
+        
+        Writes a temporary file next to the destination and renames it into
+        place. When the process can't write there, falls back to a single
+        sudo install(1) call from a temporary file in /tmp.
+        """
+        try:
+            with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(dst), delete=False) as f:
+                f.write(content)
+                tmp_path = f.name
+        except PermissionError:
+            tmp_path = None
+        
+        if tmp_path is not None:
+            try:
+                os.chmod(tmp_path, mode)
+                os.replace(tmp_path, dst)
+                return
+            except PermissionError:
+                os.remove(tmp_path)
+        
+        with tempfile.NamedTemporaryFile('w', delete=False) as f:
+            f.write(content)
+            tmp_path = f.name
+        try:
+            subprocess.run(['sudo', 'install', '-m', f'{mode:o}', tmp_path, dst], check=True)
+        finally:
+            os.remove(tmp_path)
+    
     def restart_network_services(self):
-        """Restart network services to apply changes"""
+        """
+        Restart network services to apply changes
+        
+        The restart runs in a detached shell so the caller doesn't wait for
+        networking to come back up. Interface and status reads bypass the
+        cache until it has finished.
+        """
+        global _network_restart_process
         try:
             logger.info("Restarting network services...")
             
-            # Stop services
-            subprocess.run(['sudo', 'systemctl', 'stop', 'hostapd'], check=False)
-            subprocess.run(['sudo', 'systemctl', 'stop', 'dnsmasq'], check=False)
-            
-            # Restart networking
-            subprocess.run(['sudo', 'systemctl', 'restart', 'networking'], check=True)
-            
-            # Start services
-            subprocess.run(['sudo', 'systemctl', 'start', 'dnsmasq'], check=True)
-            subprocess.run(['sudo', 'systemctl', 'start', 'hostapd'], check=True)
+            # Stop services, restart networking, then start services again.
+            # systemctl takes several units per call.
+            process = subprocess.Popen(
+                ['sh', '-c', RESTART_NETWORK_SCRIPT],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+            with _interface_cache_lock:
+                _network_restart_process = process
+                _interface_cache.clear()
             
-            logger.info("Network services restarted successfully")
+            logger.info("Network services restart started")
             return True
             
         except Exception as e:
@@ -242,6 +415,7 @@ wpa=0
         """Restart the entire system"""
         try:
             logger.info("Initiating system restart...")
+            self._clear_vlan_prerequisites_marker()
             subprocess.run(['sudo', 'shutdown', '-r', '+1'], check=True)
             return True
             
@@ -250,52 +424,111 @@ wpa=0
             return False
     
     def get_current_network_status(self):
-        """Get current network interface status"""
+        """Get current network interface status (cached for a few seconds)"""
+        return _get_cached(
+            'status', NETWORK_STATUS_CACHE_TTL,
+            self._read_network_status,
+            lambda status: status['status'] == 'active'
+        )
+    
+    def _read_network_status(self):
+        """Read interface and VLAN status from the system"""
         try:
-            # Get interface status
-            result = subprocess.run(['ip', 'addr', 'show'], 
+            # Get interface status; -d adds linkinfo, which marks VLANs
+            result = subprocess.run(['ip', '-j', '-d', 'addr', 'show'], 
                                   capture_output=True, text=True, check=True)
+            interfaces = json.loads(result.stdout)
             
-            # Get VLAN interfaces
-            vlan_result = subprocess.run(['ip', 'link', 'show', 'type', 'vlan'], 
-                                       capture_output=True, text=True, check=False)
+            # Pick VLAN interfaces out of the same listing
+            vlans = [
+                link for link in interfaces
+                if link.get('linkinfo', {}).get('info_kind') == 'vlan'
+            ]
             
             return {
-                'interfaces': result.stdout,
-                'vlans': vlan_result.stdout,
+                'interfaces': interfaces,
+                'vlans': vlans,
                 'status': 'active'
             }
             
         except Exception as e:
             logger.error(f"Error getting network status: {e}")
             return {
-                'interfaces': '',
-                'vlans': '',
+                'interfaces': [],
+                'vlans': [],
                 'status': 'error',
                 'error': str(e)
             }
     
     def validate_vlan_id(self, vlan_id):
         """Validate VLAN ID range"""
-        try:
-            vlan_id = int(vlan_id)
-            if 1 <= vlan_id <= 4094:
-                return True, "Valid VLAN ID"
-            else:
-                return False, "VLAN ID must be between 1 and 4094"
-        except ValueError:
+        value = str(vlan_id).strip()
+        if not (value.isascii() and value.isdigit()):
             return False, "VLAN ID must be a number"
+        if int(value) in VLAN_ID_RANGE:
+            return True, "Valid VLAN ID"
+        return False, "VLAN ID must be between 1 and 4094"
+    
+    def _apt_lists_fresh(self):
+        """Check whether apt package lists were refreshed recently"""
+        try:
+            return time.time() - os.path.getmtime(APT_LISTS_DIR) < APT_LISTS_MAX_AGE
+        except OSError:
+            return False
+    
+    def _vlan_prerequisites_cached(self):
+        """Check whether VLAN prerequisites were already satisfied this boot"""
+        if _vlan_prerequisites_ok:
+            return True
+        
+        boot_id = _current_boot_id()
+        try:
+            with open(self.vlan_marker_file, 'r') as f:
+                return boot_id is not None and f.read().strip() == boot_id
+        except OSError:
+            return False
+    
+    def _mark_vlan_prerequisites_ok(self):
+        """Remember that VLAN prerequisites are satisfied until the next boot"""
+        global _vlan_prerequisites_ok
+        _vlan_prerequisites_ok = True
+        
+        boot_id = _current_boot_id()
+        if boot_id is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.vlan_marker_file), exist_ok=True)
+            with open(self.vlan_marker_file, 'w') as f:
+                f.write(boot_id)
+        except OSError as e:
+            logger.warning(f"Could not write VLAN prerequisites marker: {e}")
+    
+    def _clear_vlan_prerequisites_marker(self):
+        """Force the VLAN prerequisites to be checked again"""
+        global _vlan_prerequisites_ok
+        _vlan_prerequisites_ok = False
+        
+        try:
+            os.unlink(self.vlan_marker_file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove VLAN prerequisites marker: {e}")
     
     def _check_vlan_prerequisites(self):
         """Check if system has VLAN support prerequisites"""
+        if self._vlan_prerequisites_cached():
+            return True, "VLAN prerequisites satisfied"
+        
         try:
             # Check if VLAN package is installed
-            result = subprocess.run(['dpkg', '-l', 'vlan'], 
+            result = subprocess.run(['dpkg-query', '-W', '-f=${Status}', 'vlan'], 
                                   capture_output=True, text=True, check=False)
-            if result.returncode != 0:
+            if result.returncode != 0 or 'ok installed' not in result.stdout:
                 # Try to install VLAN package
                 logger.info("Installing VLAN package...")
-                install_result = subprocess.run(['sudo', 'apt-get', 'update'], check=False)
+                if not self._apt_lists_fresh():
+                    subprocess.run(['sudo', 'apt-get', 'update'], check=False)
                 install_result = subprocess.run(['sudo', 'apt-get', 'install', '-y', 'vlan'], 
                                              capture_output=True, text=True, check=False)
                 if install_result.returncode != 0:
@@ -313,13 +546,11 @@ wpa=0
                 with open(modules_file, 'r') as f:
                     content = f.read()
                 if '8021q' not in content:
-                    with open('/tmp/modules_new', 'w') as f:
-                        f.write(content + '\n8021q\n')
-                    subprocess.run(['sudo', 'mv', '/tmp/modules_new', modules_file], check=True)
-                    subprocess.run(['sudo', 'chmod', '644', modules_file], check=True)
+                    self._install_file(modules_file, content + '\n8021q\n')
             except Exception as e:
                 logger.warning(f"Could not update /etc/modules: {e}")
             
+            self._mark_vlan_prerequisites_ok()
             return True, "VLAN prerequisites satisfied"
             
         except Exception as e:
@@ -327,31 +558,38 @@ wpa=0
             return False, f"Error checking VLAN support: {str(e)}"
     
     def detect_network_interfaces(self):
-        """Detect available network interfaces"""
+        """Detect available network interfaces (cached for INTERFACE_CACHE_TTL seconds)"""
+        return _get_cached(
+            'interfaces', INTERFACE_CACHE_TTL,
+            self._scan_network_interfaces,
+            lambda interfaces: interfaces['detected']
+        )
+    
+    def _scan_network_interfaces(self):
+        """List ethernet and WiFi interfaces known to the system"""
         try:
             # Get all network interfaces
-            result = subprocess.run(['ip', 'link', 'show'], 
+            result = subprocess.run(['ip', '-j', 'link', 'show'], 
                                   capture_output=True, text=True, check=True)
             
             ethernet_interfaces = []
             wifi_interfaces = []
             
-            for line in result.stdout.split('\n'):
-                if 'state UP' in line or 'state DOWN' in line:
-                    # Extract interface name
-                    parts = line.split(':')
-                    if len(parts) >= 2:
-                        interface = parts[1].strip()
-                        
-                        # Skip loopback and virtual interfaces
-                        if interface in ['lo'] or interface.startswith('veth'):
-                            continue
-                            
-                        # Classify interface type
-                        if interface.startswith(('eth', 'en')):
-                            ethernet_interfaces.append(interface)
-                        elif interface.startswith(('wlan', 'wl')):
-                            wifi_interfaces.append(interface)
+            for link in json.loads(result.stdout):
+                if link.get('operstate') not in ('UP', 'DOWN'):
+                    continue
+                
+                interface = link.get('ifname', '')
+                
+                # Skip loopback and virtual interfaces
+                if interface in ['lo'] or interface.startswith('veth'):
+                    continue
+                    
+                # Classify interface type
+                if interface.startswith(('eth', 'en')):
+                    ethernet_interfaces.append(interface)
+                elif interface.startswith(('wlan', 'wl')):
+                    wifi_interfaces.append(interface)
             
             return {
                 'ethernet': ethernet_interfaces,
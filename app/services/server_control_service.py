@@ -4,16 +4,51 @@ Handles manual server restart and control operations
 """
 import os
 import sys
+import atexit
 import signal
 import subprocess
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from django.conf import settings
 from django.core.management import call_command
 import logging
 
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+try:
+    from pystemd.systemd1 import Manager as SystemdManager
+except ImportError:
+    SystemdManager = None
+
 logger = logging.getLogger(__name__)
 
+# Common service names for PisoWiFi, in order of preference
+SYSTEMD_SERVICE_NAMES = ['pisowifi', 'pisowifi-server', 'django-pisowifi', 'opw']
+
+# Small shared pool for background work, so repeated restart requests
+# don't each get their own thread
+_background_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='pisowifi-bg')
+
+# Set once the process is exiting, so a pending restart gives up
+_shutdown_event = threading.Event()
+
+# Seconds between shutdown checks while waiting out the restart delay
+SHUTDOWN_POLL_INTERVAL = 0.25
+
+# Values accepted in the PISOWIFI_SERVER_TYPE setting
+SERVER_TYPE_NAMES = {
+    'gunicorn': 'Gunicorn',
+    'uwsgi': 'uWSGI',
+    'runserver': 'Django Development Server',
+}
+
+# File under BASE_DIR remembering which systemd unit runs the server
+SYSTEMD_UNIT_CACHE_FILE = '.pisowifi_systemd_unit'
+
 class ServerControlService:
     """
     Service for controlling server operations like manual restart
@@ -22,6 +57,78 @@ class ServerControlService:
     def __init__(self):
         self.restart_requested = False
         self.restart_delay = 3  # seconds before restart
+        self._cancel_event = threading.Event()
+        self.systemd_unit_cache_file = os.path.join(settings.BASE_DIR, SYSTEMD_UNIT_CACHE_FILE)
+        # Parent process and server type don't change for the life of the
+        # worker, so they are looked up once
+        self._process_info = None
+        self._static_server_info = None
+    
+    def invalidate(self):
+        """Forget the cached process information"""
+        self._process_info = None
+        self._static_server_info = None
+    
+    def _get_process_info(self):
+        """Return cached parent process name and server type detection"""
+        if self._process_info is None:
+            self._process_info = self._probe_process_info()
+        return self._process_info
+    
+    def _parent_comm(self):
+        """Parent process name from /proc, or None where that isn't available"""
+        try:
+            with open(f'/proc/{os.getppid()}/comm', 'r') as f:
+                return f.read().strip().lower()
+        except OSError:
+            return None
+    
+    def _probe_process_info(self):
+        """Inspect the parent process and runtime to find the server type"""
+        explicit = getattr(settings, 'PISOWIFI_SERVER_TYPE', '').strip().lower()
+        if explicit:
+            server_type = SERVER_TYPE_NAMES.get(explicit, explicit)
+            return {
+                'parent_name': None,
+                'is_gunicorn': server_type == 'Gunicorn',
+                'is_uwsgi': server_type == 'uWSGI',
+                'server_type': server_type,
+            }
+        
+        parent_name = self._parent_comm()
+        if parent_name is None and psutil is not None:
+            try:
+                parent = psutil.Process().parent()
+                parent_name = parent.name().lower() if parent else ''
+            except psutil.Error:
+                pass
+        
+        if parent_name is None:
+            is_gunicorn = 'gunicorn' in str(sys.argv[0]).lower()
+        else:
+            is_gunicorn = 'gunicorn' in parent_name
+        
+        try:
+            import uwsgi
+            is_uwsgi = True
+        except ImportError:
+            is_uwsgi = False
+        
+        if 'runserver' in sys.argv:
+            server_type = 'Django Development Server'
+        elif is_gunicorn:
+            server_type = 'Gunicorn'
+        elif is_uwsgi:
+            server_type = 'uWSGI'
+        else:
+            server_type = 'Unknown'
+        
+        return {
+            'parent_name': parent_name,
+            'is_gunicorn': is_gunicorn,
+            'is_uwsgi': is_uwsgi,
+            'server_type': server_type,
+        }
     
     def request_manual_restart(self, delay_seconds=3):
         """
@@ -30,16 +137,12 @@ class ServerControlService:
         try:
             self.restart_delay = delay_seconds
             self.restart_requested = True
+            self._cancel_event.clear()
             
             logger.info(f"Manual server restart requested with {delay_seconds}s delay")
             
-            # Start restart in background thread
-            restart_thread = threading.Thread(
-                target=self._perform_restart,
-                daemon=True,
-                name="ManualServerRestart"
-            )
-            restart_thread.start()
+            # Run the restart on the shared background pool
+            _background_pool.submit(self._perform_restart)
             
             return {
                 'status': 'success',
@@ -60,9 +163,7 @@ class ServerControlService:
         """
         try:
             logger.info(f"Waiting {self.restart_delay} seconds before restart...")
-            time.sleep(self.restart_delay)
-            
-            if not self.restart_requested:
+            if self._wait_for_restart_delay() or not self.restart_requested:
                 logger.info("Restart was cancelled")
                 return
             
@@ -79,6 +180,20 @@ class ServerControlService:
         except Exception as e:
             logger.error(f"Error during manual restart: {e}")
     
+    def _wait_for_restart_delay(self):
+        """
+        Wait out the restart delay; returns True if the restart was
+        cancelled or the process started shutting down meanwhile
+        """
+        deadline = time.monotonic() + self.restart_delay
+        while not _shutdown_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            if self._cancel_event.wait(min(remaining, SHUTDOWN_POLL_INTERVAL)):
+                return True
+        return True
+    
     def _restart_development_server(self):
         """
         Restart Django development server
@@ -87,8 +202,10 @@ class ServerControlService:
             # For development server, we need to exit and let the process manager restart
             logger.info("Shutting down Django development server for restart...")
             
-            # Send SIGTERM to current process
-            if hasattr(os, 'kill'):
+            # Send SIGTERM to current process, unless it is already stopping
+            if _shutdown_event.is_set():
+                logger.info("Shutdown already in progress - skipping restart signal")
+            elif hasattr(os, 'kill'):
                 os.kill(os.getpid(), signal.SIGTERM)
             else:
                 # Fallback for Windows
@@ -104,16 +221,15 @@ class ServerControlService:
         Restart production server (gunicorn, uwsgi, etc.)
         """
         try:
-            # Try to detect the server type and restart accordingly
+            # Detect the server type once and restart accordingly
+            server_type = self._detect_server_type()
             
-            # Check for gunicorn
-            if self._is_gunicorn():
+            if server_type == 'Gunicorn':
                 logger.info("Detected Gunicorn - sending HUP signal for graceful restart")
                 os.kill(os.getppid(), signal.SIGHUP)
                 return
             
-            # Check for uwsgi
-            if self._is_uwsgi():
+            if server_type == 'uWSGI':
                 logger.info("Detected uWSGI - sending SIGHUP for graceful restart")
                 os.kill(os.getppid(), signal.SIGHUP)
                 return
@@ -132,51 +248,96 @@ class ServerControlService:
     
     def _is_gunicorn(self):
         """Check if running under Gunicorn"""
-        try:
-            import psutil
-            current_process = psutil.Process()
-            parent = current_process.parent()
-            return parent and 'gunicorn' in parent.name().lower()
-        except:
-            return 'gunicorn' in str(sys.argv[0]).lower()
+        return self._get_process_info()['is_gunicorn']
     
     def _is_uwsgi(self):
         """Check if running under uWSGI"""
+        return self._get_process_info()['is_uwsgi']
+    
+    def _resolve_systemd_unit(self):
+        """
+        Find the systemd service running PisoWiFi
+        
+        The unit name is remembered in SYSTEMD_UNIT_CACHE_FILE; otherwise
+        the active services are listed once and matched against the
+        common PisoWiFi service names.
+        """
         try:
-            import uwsgi
+            with open(self.systemd_unit_cache_file, 'r') as f:
+                unit = f.read().strip()
+            if unit:
+                return unit
+        except OSError:
+            pass
+        
+        result = subprocess.run([
+            'systemctl', 'list-units', '--type=service', '--state=active',
+            '--no-legend', '--plain'
+        ], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=5)
+        
+        active_units = {line.split()[0] for line in result.stdout.splitlines() if line.strip()}
+        for service_name in SYSTEMD_SERVICE_NAMES:
+            if f'{service_name}.service' in active_units:
+                try:
+                    with open(self.systemd_unit_cache_file, 'w') as f:
+                        f.write(service_name)
+                except OSError as e:
+                    logger.warning(f"Could not cache systemd unit name: {e}")
+                return service_name
+        
+        return None
+    
+    def _forget_systemd_unit(self):
+        """Drop the cached systemd unit name"""
+        try:
+            os.unlink(self.systemd_unit_cache_file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Could not remove systemd unit cache: {e}")
+    
+    def _restart_unit_over_dbus(self, service_name):
+        """Ask systemd to restart a unit directly, when pystemd is available"""
+        if SystemdManager is None:
+            return False
+        try:
+            with SystemdManager() as manager:
+                manager.Manager.RestartUnit(f'{service_name}.service'.encode(), b'replace')
             return True
-        except ImportError:
+        except Exception as e:
+            logger.info(f"D-Bus restart unavailable, falling back to systemctl: {e}")
             return False
     
     def _try_systemd_restart(self):
         """Try to restart via systemd service"""
         try:
-            # Common service names for PisoWiFi
-            service_names = ['pisowifi', 'pisowifi-server', 'django-pisowifi', 'opw']
-            
-            for service_name in service_names:
-                try:
-                    # Check if service exists
-                    result = subprocess.run([
-                        'systemctl', 'is-active', service_name
-                    ], capture_output=True, text=True, timeout=5)
-                    
-                    if result.returncode == 0:
-                        logger.info(f"Found systemd service: {service_name}")
-                        # Restart the service
-                        subprocess.run([
-                            'sudo', 'systemctl', 'restart', service_name
-                        ], timeout=10)
-                        logger.info(f"Restarted systemd service: {service_name}")
-                        return True
-                        
-                except subprocess.TimeoutExpired:
-                    continue
-                except subprocess.CalledProcessError:
-                    continue
+            for attempt in range(2):
+                service_name = self._resolve_systemd_unit()
+                if not service_name:
+                    return False
+                
+                logger.info(f"Found systemd service: {service_name}")
+                if self._restart_unit_over_dbus(service_name):
+                    logger.info(f"Restarted systemd service over D-Bus: {service_name}")
+                    return True
+                
+                # Restart the service
+                result = subprocess.run([
+                    'sudo', 'systemctl', 'restart', service_name
+                ], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, timeout=10)
+                
+                if result.returncode == 0:
+                    logger.info(f"Restarted systemd service: {service_name}")
+                    return True
+                
+                # The cached unit may be stale, look it up again once
+                self._forget_systemd_unit()
             
             return False
             
+        except subprocess.TimeoutExpired:
+            return False
         except Exception as e:
             logger.error(f"Error trying systemd restart: {e}")
             return False
@@ -186,6 +347,7 @@ class ServerControlService:
         Cancel a pending restart request
         """
         self.restart_requested = False
+        self._cancel_event.set()
         logger.info("Manual restart request cancelled")
         return {
             'status': 'success',
@@ -197,15 +359,21 @@ class ServerControlService:
         Get information about the current server environment
         """
         try:
+            # Everything but the process ids is fixed for the life of the worker
+            if self._static_server_info is None:
+                self._static_server_info = {
+                    'python_executable': sys.executable,
+                    'python_version': sys.version,
+                    'django_version': getattr(settings, 'DJANGO_VERSION', 'Unknown'),
+                    'command_line': ' '.join(sys.argv),
+                    'server_type': self._detect_server_type(),
+                    'restart_available': True
+                }
+            
             info = {
-                'python_executable': sys.executable,
-                'python_version': sys.version,
-                'django_version': getattr(settings, 'DJANGO_VERSION', 'Unknown'),
+                **self._static_server_info,
                 'process_id': os.getpid(),
                 'parent_process_id': os.getppid(),
-                'command_line': ' '.join(sys.argv),
-                'server_type': self._detect_server_type(),
-                'restart_available': True
             }
             
             return {
@@ -222,14 +390,7 @@ class ServerControlService:
     
     def _detect_server_type(self):
         """Detect what type of server we're running under"""
-        if 'runserver' in sys.argv:
-            return 'Django Development Server'
-        elif self._is_gunicorn():
-            return 'Gunicorn'
-        elif self._is_uwsgi():
-            return 'uWSGI'
-        else:
-            return 'Unknown'
+        return self._get_process_info()['server_type']
 
 # Global instance
 server_control = ServerControlService()
@@ -250,4 +411,9 @@ def get_server_status():
     """
     Convenience function to get server information
     """
-    return server_control.get_server_info()
\ No newline at end of file
+    return server_control.get_server_info()
+
+# Set the shutdown flag when the interpreter exits. threading's exit hooks
+# run before the pool's worker threads are joined (plain atexit runs after),
+# so a restart waiting out its delay gives up instead of firing mid-shutdown
+getattr(threading, '_register_atexit', atexit.register)(_shutdown_event.set)
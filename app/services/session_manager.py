@@ -3,6 +3,8 @@ Session Management Service for Long-Running Operations
 Handles session extension and management during system updates
 """
 import time
+import heapq
+import itertools
 import threading
 from django.contrib.sessions.models import Session
 from django.utils import timezone
@@ -11,6 +13,138 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Expired sessions removed per DELETE by cleanup_expired_update_sessions
+SESSION_CLEANUP_BATCH_SIZE = 5000
+
+class _KeepAliveRegistry:
+    """
+    Runs every SessionKeepAlive from one shared thread
+    
+    Keep-alives sit in a min-heap ordered by their next extension time; the
+    thread sleeps on a condition until the earliest one is due, and
+    register/unregister wake it early. The thread exits when nothing is left
+    and is started again by the next registration.
+    
+    Each active keep-alive maps to the token of its one live heap entry;
+    entries whose token no longer matches (unregistered or re-registered
+    since) are stale and skipped when popped.
+    """
+    
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._heap = []
+        self._active = {}
+        self._counter = itertools.count()
+        self._thread = None
+    
+    def register(self, keeper):
+        """Schedule a keep-alive, first extension after its interval"""
+        with self._condition:
+            self._push(keeper)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    daemon=True,
+                    name="SessionKeepAlive"
+                )
+                self._thread.start()
+            self._condition.notify()
+    
+    def unregister(self, keeper):
+        """Stop extending a keep-alive's session; returns whether it was active"""
+        with self._condition:
+            if self._active.pop(keeper, None) is None:
+                return False
+            self._condition.notify()
+            return True
+    
+    def _push(self, keeper):
+        """Schedule the keeper's next extension, replacing any earlier entry"""
+        due = time.monotonic() + keeper.extend_interval
+        token = next(self._counter)
+        self._active[keeper] = token
+        heapq.heappush(self._heap, (due, token, keeper))
+    
+    def _is_live(self, entry):
+        return self._active.get(entry[2]) == entry[1]
+    
+    def _next_due(self):
+        """
+        Wait for and pop the live entries that are due, as (token, keeper)
+        pairs, or None when idle
+        """
+        with self._condition:
+            while True:
+                # Drop stale entries
+                while self._heap and not self._is_live(self._heap[0]):
+                    heapq.heappop(self._heap)
+                
+                if not self._heap:
+                    self._thread = None
+                    return None
+                
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                
+                due = []
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    entry = heapq.heappop(self._heap)
+                    if self._is_live(entry):
+                        due.append(entry[1:])
+                return due
+    
+    def _run(self):
+        while True:
+            due = self._next_due()
+            if due is None:
+                return
+            
+            try:
+                _extend_sessions([keeper for _, keeper in due])
+            except Exception as e:
+                logger.error(f"Error extending sessions: {e}")
+            
+            with self._condition:
+                for token, keeper in due:
+                    # Re-registered meanwhile: it already has a newer entry
+                    if self._active.get(keeper) != token:
+                        continue
+                    if keeper.stop_event.is_set():
+                        del self._active[keeper]
+                    else:
+                        self._push(keeper)
+
+_keep_alive_registry = _KeepAliveRegistry()
+
+def _extend_sessions(keepers):
+    """
+    Extend the sessions of all due keep-alives, one UPDATE per extension
+    length; keep-alives whose session no longer exists are stopped
+    """
+    by_extension = {}
+    for keeper in keepers:
+        by_extension.setdefault(keeper.session_extension, []).append(keeper)
+    
+    for extension, group in by_extension.items():
+        keys = {keeper.session_key for keeper in group}
+        new_expiry = timezone.now() + timedelta(seconds=extension)
+        updated = Session.objects.filter(session_key__in=keys).update(expire_date=new_expiry)
+        
+        if updated < len(keys):
+            existing = set(Session.objects.filter(session_key__in=keys).values_list('session_key', flat=True))
+        else:
+            existing = keys
+        
+        for keeper in group:
+            if keeper.session_key in existing:
+                logger.debug(f"Extended session {keeper.session_key} until {new_expiry}")
+            else:
+                logger.warning(f"Session {keeper.session_key} no longer exists")
+                keeper.stop_event.set()
+
 class SessionKeepAlive:
     """
     Manages session keep-alive for long-running operations like system updates
@@ -19,53 +153,22 @@ class SessionKeepAlive:
     def __init__(self, request, operation_name="operation"):
         self.session_key = request.session.session_key
         self.operation_name = operation_name
-        self.keep_alive_thread = None
         self.stop_event = threading.Event()
         self.extend_interval = 300  # Extend session every 5 minutes
         self.session_extension = 3600  # Extend by 1 hour each time
         
     def start_keep_alive(self):
-        """Start the session keep-alive thread"""
+        """Start extending the session from the shared keep-alive thread"""
         if self.session_key:
-            self.keep_alive_thread = threading.Thread(
-                target=self._keep_alive_worker,
-                daemon=True,
-                name=f"SessionKeepAlive-{self.operation_name}"
-            )
-            self.keep_alive_thread.start()
+            self.stop_event.clear()
+            _keep_alive_registry.register(self)
             logger.info(f"Started session keep-alive for {self.operation_name} (session: {self.session_key})")
     
     def stop_keep_alive(self):
-        """Stop the session keep-alive thread"""
-        if self.keep_alive_thread and self.keep_alive_thread.is_alive():
-            self.stop_event.set()
-            self.keep_alive_thread.join(timeout=5)
+        """Stop extending the session"""
+        self.stop_event.set()
+        if _keep_alive_registry.unregister(self):
             logger.info(f"Stopped session keep-alive for {self.operation_name}")
-    
-    def _keep_alive_worker(self):
-        """Worker function that extends session periodically"""
-        while not self.stop_event.wait(self.extend_interval):
-            try:
-                self._extend_session()
-            except Exception as e:
-                logger.warning(f"Failed to extend session for {self.operation_name}: {e}")
-                break
-    
-    def _extend_session(self):
-        """Extend the current session"""
-        try:
-            if self.session_key:
-                session = Session.objects.get(session_key=self.session_key)
-                # Extend session by the specified time
-                new_expiry = timezone.now() + timedelta(seconds=self.session_extension)
-                session.expire_date = new_expiry
-                session.save()
-                logger.debug(f"Extended session {self.session_key} until {new_expiry}")
-        except Session.DoesNotExist:
-            logger.warning(f"Session {self.session_key} no longer exists")
-            self.stop_event.set()
-        except Exception as e:
-            logger.error(f"Error extending session: {e}")
 
 class UpdateSessionManager:
     """
@@ -86,8 +189,36 @@ class UpdateSessionManager:
         """Context manager exit - stop session management"""
         self.stop_session_management()
     
-    def start_session_management(self):
-        """Start managing the session for update operations"""
+    def _save_session(self, extra_time=None):
+        """
+        Write the session and refresh its expiry with a single UPDATE, like
+        session.save() would; extra_time extends the expiry instead
+        
+        Falls back to a regular save when the session row isn't in the
+        database (e.g. a different session engine).
+        """
+        session = self.request.session
+        if extra_time:
+            expire_date = timezone.now() + timedelta(seconds=extra_time)
+        else:
+            expire_date = session.get_expiry_date()
+        fields = {
+            'session_data': session.encode(dict(session.items())),
+            'expire_date': expire_date,
+        }
+        
+        updated = Session.objects.filter(session_key=session.session_key).update(**fields)
+        if updated:
+            # Data and expiry are persisted, nothing left for the session middleware to save
+            session.modified = False
+        else:
+            session.save()
+    
+    def start_session_management(self, extra_time=None):
+        """
+        Start managing the session for update operations, optionally
+        extending it by extra_time seconds
+        """
         try:
             # Force session creation if it doesn't exist
             if not self.request.session.session_key:
@@ -106,7 +237,7 @@ class UpdateSessionManager:
                 'version': self.update.Version_Number,
                 'started_at': timezone.now().isoformat()
             }
-            self.request.session.save()
+            self._save_session(extra_time)
             
             logger.info(f"Started session management for update {self.update.Version_Number}")
             
@@ -122,7 +253,7 @@ class UpdateSessionManager:
             # Clean up session data
             if 'active_update' in self.request.session:
                 del self.request.session['active_update']
-                self.request.session.save()
+                self._save_session()
             
             logger.info(f"Stopped session management for update {self.update.Version_Number}")
             
@@ -133,9 +264,9 @@ class UpdateSessionManager:
         """Extend session specifically for update operations (default 2 hours)"""
         try:
             if self.request.session.session_key:
-                session = Session.objects.get(session_key=self.request.session.session_key)
-                session.expire_date = timezone.now() + timedelta(seconds=extra_time)
-                session.save()
+                Session.objects.filter(session_key=self.request.session.session_key).update(
+                    expire_date=timezone.now() + timedelta(seconds=extra_time)
+                )
                 logger.info(f"Extended session for update by {extra_time} seconds")
         except Exception as e:
             logger.error(f"Failed to extend session for update: {e}")
@@ -152,19 +283,24 @@ def create_update_session_context(request, update_object):
 
 def is_session_active(session_key):
     """Check if a session is still active"""
-    try:
-        session = Session.objects.get(session_key=session_key)
-        return session.expire_date > timezone.now()
-    except Session.DoesNotExist:
-        return False
+    return Session.objects.filter(session_key=session_key, expire_date__gt=timezone.now()).exists()
 
 def cleanup_expired_update_sessions():
     """Clean up expired sessions that were tracking updates"""
     try:
-        # This could be called periodically to clean up
-        expired_sessions = Session.objects.filter(expire_date__lt=timezone.now())
-        count = expired_sessions.count()
-        expired_sessions.delete()
+        # This could be called periodically to clean up. Delete in chunks
+        # so a large backlog doesn't hold one long write lock.
+        now = timezone.now()
+        count = 0
+        while True:
+            ids = list(
+                Session.objects.filter(expire_date__lt=now)
+                .values_list('pk', flat=True)[:SESSION_CLEANUP_BATCH_SIZE]
+            )
+            if not ids:
+                break
+            deleted, _ = Session.objects.filter(pk__in=ids).delete()
+            count += deleted
         logger.info(f"Cleaned up {count} expired sessions")
     except Exception as e:
         logger.error(f"Failed to cleanup expired sessions: {e}")
\ No newline at end of file
@@ -6,13 +6,19 @@ import os
 import sys
 import json
 import time
+import queue
+import select
 import signal
+import socket
 import logging
+import logging.handlers
 import threading
 import subprocess
 from pathlib import Path
+from collections import deque
 from datetime import datetime
 from django.conf import settings
+from django.db import connection
 from django.utils import timezone
 
 # Add project root to Python path for Django imports
@@ -28,7 +34,57 @@ django.setup()
 from app.models import SystemUpdate
 from app.services.update_service import UpdateInstallService
 
-logger = logging.getLogger(__name__)
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+# Named explicitly so the daemon logs to the same logger whether this module
+# is imported or run as a script; it propagates to the 'app' logger
+logger = logging.getLogger('app.services.update_daemon')
+
+DAEMON_DIR = Path(settings.BASE_DIR) / 'temp' / 'daemon'
+
+# Touched by the web process after queueing an update, to wake the daemon
+TRIGGER_FILE_NAME = 'trigger'
+
+# Seconds between stat() checks of the trigger file when inotify is missing,
+# and between safety-net database checks when the trigger has not fired
+POLL_INTERVAL = 2
+TRIGGER_POLL_INTERVAL = 30
+
+# Installer output is appended to an ndjson file, rotated at this size
+UPDATE_LOG_MAX_BYTES = 1024 * 1024
+
+# Log lines returned alongside the progress snapshot, and how much of the
+# log file's tail is read to find them
+PROGRESS_LOG_LINES = 100
+PROGRESS_LOG_TAIL_BYTES = 64 * 1024
+
+# The daemon runs below the web workers; child processes inherit this
+DAEMON_NICE = 10
+
+# Seconds stop_daemon waits for a graceful exit, and for the exit after SIGKILL
+STOP_TIMEOUT = 30
+KILL_TIMEOUT = 5
+
+# Daemon log rotation
+DAEMON_LOG_MAX_BYTES = 5 * 1024 * 1024
+DAEMON_LOG_BACKUP_COUNT = 3
+
+# Writes the daemon log from a background thread; only the daemon process
+# starts it; clients log through the regular 'app' logger
+_log_listener = None
+_log_queue_handler = None
+
+# The running daemon answers status/progress queries on this UNIX socket;
+# clients fall back to the JSON files when it does not answer in time
+STATUS_SOCKET_NAME = 'status.sock'
+STATUS_SOCKET_TIMEOUT = 0.5
+
+# Installer log lines waiting for the writer thread, and how many it writes at once
+LOG_QUEUE_SIZE = 2048
+LOG_BATCH_SIZE = 64
 
 class UpdateDaemon:
     """
@@ -36,57 +92,109 @@ class UpdateDaemon:
     """
     
     def __init__(self):
-        self.daemon_dir = Path(settings.BASE_DIR) / 'temp' / 'daemon'
+        self.daemon_dir = DAEMON_DIR
         self.daemon_dir.mkdir(parents=True, exist_ok=True)
         
         # Daemon control files
         self.pid_file = self.daemon_dir / 'update_daemon.pid'
-        self.status_file = self.daemon_dir / 'update_status.json'
-        self.progress_file = self.daemon_dir / 'update_progress.json'
+        self.state_file = self.daemon_dir / 'daemon_state.json'
         self.log_file = self.daemon_dir / 'update_daemon.log'
+        self.update_log_file = self.daemon_dir / 'update_log.ndjson'
+        self.trigger_file = self.daemon_dir / TRIGGER_FILE_NAME
+        self.status_socket = self.daemon_dir / STATUS_SOCKET_NAME
         
         # Daemon state
         self.running = False
         self.current_update_id = None
         self.shutdown_requested = False
         
-        # Setup logging
-        self._setup_logging()
+        # Status and progress, written together to the state file; the
+        # encoded status is kept for the status socket
+        self._state = {'status': None, 'progress': None}
+        self._status_bytes = None
+        self._progress_data = None
+        self._recent_logs = deque(maxlen=PROGRESS_LOG_LINES)
+        self._status_server = None
         
-    def _setup_logging(self):
-        """Setup daemon-specific logging"""
-        daemon_logger = logging.getLogger('update_daemon')
-        daemon_logger.setLevel(logging.INFO)
+        self._update_log_fp = None
+        self._update_log_lock = threading.Lock()
+        
+        # Installer log lines are handed to a writer thread, started with the first update
+        self._log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self._log_thread = None
         
-        # File handler
-        file_handler = logging.FileHandler(self.log_file)
-        file_handler.setLevel(logging.INFO)
+        # Wakeup sources for the idle loop, created in start_daemon
+        self._inotify = None
+        self._wake_r = None
+        self._wake_w = None
+        self._trigger_mtime = None
         
-        # Formatter
-        formatter = logging.Formatter(
-            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        # Poll query for queued updates; the model is only loaded on a hit
+        quote = connection.ops.quote_name
+        meta = SystemUpdate._meta
+        self._poll_sql = (
+            f"SELECT {quote(meta.pk.column)} FROM {quote(meta.db_table)} "
+            f"WHERE {quote(meta.get_field('Status').column)} = %s "
+            f"ORDER BY {quote(meta.pk.column)} LIMIT 1"
         )
-        file_handler.setFormatter(formatter)
         
-        daemon_logger.addHandler(file_handler)
+    def _setup_logging(self):
+        """
+        Setup daemon-specific logging, written to a rotating file by a queue
+        listener
+        
+        Only called by the process holding the PID file, so a single process
+        writes and rotates the daemon log.
+        """
+        global _log_listener, _log_queue_handler
         
-        # Set as default logger for this module
-        global logger
-        logger = daemon_logger
+        if _log_listener is None:
+            # Rotating file handler, owned by the listener thread
+            file_handler = logging.handlers.RotatingFileHandler(
+                self.log_file, maxBytes=DAEMON_LOG_MAX_BYTES, backupCount=DAEMON_LOG_BACKUP_COUNT
+            )
+            file_handler.setLevel(logging.INFO)
+            
+            # Formatter
+            formatter = logging.Formatter(
+                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+            )
+            file_handler.setFormatter(formatter)
+            
+            log_queue = queue.Queue(-1)
+            _log_queue_handler = logging.handlers.QueueHandler(log_queue)
+            logger.addHandler(_log_queue_handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            _log_listener = logging.handlers.QueueListener(
+                log_queue, file_handler, respect_handler_level=True
+            )
+            _log_listener.start()
+            
+    def _stop_logging(self):
+        """Flush the daemon log and hand logging back to the 'app' logger"""
+        global _log_listener, _log_queue_handler
         
+        if _log_listener is not None:
+            _log_listener.stop()
+            _log_listener = None
+            logger.removeHandler(_log_queue_handler)
+            _log_queue_handler = None
+            logger.setLevel(logging.NOTSET)
+            logger.propagate = True
+            
     def start_daemon(self):
         """Start the update daemon"""
         try:
-            # Check if daemon is already running
-            if self.is_running():
+            # Claim the PID file; fails if another daemon holds it
+            if not self._acquire_pidfile():
                 logger.warning("Update daemon is already running")
                 return False
                 
-            # Write PID file
-            with open(self.pid_file, 'w') as f:
-                f.write(str(os.getpid()))
-                
-            # Initialize status file
+            self._setup_logging()
+            self._lower_priority()
+            
+            # Initialize status
             self._write_status({
                 'status': 'idle',
                 'started_at': datetime.now().isoformat(),
@@ -97,7 +205,9 @@ class UpdateDaemon:
             self.running = True
             logger.info(f"Update daemon started with PID {os.getpid()}")
             
-            # Setup signal handlers
+            # Setup wakeups, the status socket and signal handlers
+            self._setup_wakeup()
+            self._start_status_server()
             signal.signal(signal.SIGTERM, self._signal_handler)
             signal.signal(signal.SIGINT, self._signal_handler)
             
@@ -108,8 +218,30 @@ class UpdateDaemon:
             
         except Exception as e:
             logger.error(f"Failed to start daemon: {e}")
+            self._stop_logging()
             return False
             
+    def _lower_priority(self):
+        """
+        Run the daemon (and the installer commands it spawns) as a low
+        priority batch process, so installs don't stall the captive portal
+        """
+        try:
+            if hasattr(os, 'sched_setscheduler'):
+                os.sched_setscheduler(0, os.SCHED_BATCH, os.sched_param(0))
+            os.nice(DAEMON_NICE)
+        except OSError as e:
+            logger.warning(f"Could not lower daemon CPU priority: {e}")
+            
+        # Lowest best-effort I/O priority; the idle class could starve an install indefinitely
+        try:
+            subprocess.run(
+                ['ionice', '-c', '2', '-n', '7', '-p', str(os.getpid())],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=5
+            )
+        except (OSError, subprocess.SubprocessError) as e:
+            logger.warning(f"Could not lower daemon I/O priority: {e}")
+            
     def _daemon_loop(self):
         """Main daemon loop"""
         logger.info("Starting daemon main loop")
@@ -123,8 +255,8 @@ class UpdateDaemon:
                     logger.info(f"Found pending update: {pending_update.id}")
                     self._process_update(pending_update)
                 else:
-                    # Sleep for a short interval before checking again
-                    time.sleep(2)
+                    # Wait for a trigger (or the poll interval) before checking again
+                    self._wait_for_trigger()
                     
             except Exception as e:
                 logger.error(f"Error in daemon loop: {e}")
@@ -133,13 +265,84 @@ class UpdateDaemon:
         logger.info("Daemon loop ended")
         self._cleanup()
         
+    def _setup_wakeup(self):
+        """
+        Prepare the idle loop's wakeups: a self-pipe written by the signal
+        handler, plus an inotify watch on the trigger file when available
+        """
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        self._trigger_mtime = self._read_trigger_mtime()
+        
+        if INotify is not None:
+            try:
+                self._inotify = INotify()
+                self._inotify.add_watch(
+                    str(self.daemon_dir),
+                    inotify_flags.CREATE | inotify_flags.ATTRIB | inotify_flags.CLOSE_WRITE
+                )
+            except OSError as e:
+                logger.warning(f"inotify unavailable, polling for updates instead: {e}")
+                self._inotify = None
+                
+    def _read_trigger_mtime(self):
+        """Return the trigger file's mtime, or None if it has never been touched"""
+        try:
+            return self.trigger_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+            
+    def _wait_for_trigger(self):
+        """
+        Block until the trigger file is touched, a signal arrives or the
+        safety-net interval passes. Without inotify the trigger file is
+        stat()ed every POLL_INTERVAL seconds, so the database is still only
+        queried when something was queued
+        """
+        deadline = time.monotonic() + TRIGGER_POLL_INTERVAL
+        fds = [self._wake_r] + ([self._inotify.fd] if self._inotify else [])
+        
+        while self.running and not self.shutdown_requested:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            if not self._inotify:
+                remaining = min(remaining, POLL_INTERVAL)
+            try:
+                ready, _, _ = select.select(fds, [], [], remaining)
+            except InterruptedError:
+                continue
+            
+            if not self._inotify:
+                mtime = self._read_trigger_mtime()
+                if mtime != self._trigger_mtime:
+                    self._trigger_mtime = mtime
+                    return
+            
+            if self._wake_r in ready:
+                try:
+                    os.read(self._wake_r, 512)
+                except BlockingIOError:
+                    pass
+                return
+            
+            if self._inotify and self._inotify.fd in ready:
+                # The daemon's own state files live in the same directory
+                events = self._inotify.read(timeout=0)
+                if any(event.name == TRIGGER_FILE_NAME for event in events):
+                    return
+            
     def _check_for_pending_updates(self):
         """Check database for pending update installations"""
         try:
             # Look for updates that are marked for daemon processing
-            return SystemUpdate.objects.filter(
-                Status='daemon_pending'
-            ).first()
+            with connection.cursor() as cursor:
+                cursor.execute(self._poll_sql, ['daemon_pending'])
+                row = cursor.fetchone()
+            if row is None:
+                return None
+            return SystemUpdate.objects.filter(pk=row[0]).first()
         except Exception as e:
             logger.error(f"Error checking for pending updates: {e}")
             return None
@@ -147,27 +350,27 @@ class UpdateDaemon:
     def _process_update(self, update):
         """Process a single update installation"""
         self.current_update_id = update.id
+        self._recent_logs.clear()
         
         try:
             logger.info(f"Starting installation of update {update.Version_Number}")
             
-            # Update status
-            self._write_status({
-                'status': 'installing',
-                'current_update': update.id,
-                'version': update.Version_Number,
-                'started_at': datetime.now().isoformat(),
-                'message': f'Installing update {update.Version_Number}'
-            })
-            
-            # Initialize progress tracking
-            self._write_progress({
-                'update_id': update.id,
-                'progress': 0,
-                'status': 'installing',
-                'message': 'Starting installation',
-                'logs': []
-            })
+            # Update status and initialize progress tracking
+            self._write_state(
+                status_data={
+                    'status': 'installing',
+                    'current_update': update.id,
+                    'version': update.Version_Number,
+                    'started_at': datetime.now().isoformat(),
+                    'message': f'Installing update {update.Version_Number}'
+                },
+                progress_data={
+                    'update_id': update.id,
+                    'progress': 0,
+                    'status': 'installing',
+                    'message': 'Starting installation'
+                }
+            )
             
             # Mark update as being processed by daemon
             update.Status = 'installing'
@@ -175,16 +378,12 @@ class UpdateDaemon:
             update.Started_At = timezone.now()
             update.save()
             
-            # Create install service and run installation
-            install_service = UpdateInstallService(update)
-            
-            # Override the install service's logging to also write to our progress file
-            original_log = install_service._log
-            def enhanced_log(message, level="INFO"):
-                original_log(message, level)
-                self._append_log(update.id, f"[{level}] {message}")
-                
-            install_service._log = enhanced_log
+            # Create install service, queueing every log line for our log
+            # file regardless of the installer logger's level
+            install_service = UpdateInstallService(
+                update,
+                log_callback=lambda message, level: self._queue_log(update.id, f"[{level}] {message}")
+            )
             
             # Run the installation
             result = install_service.install_update()
@@ -192,20 +391,21 @@ class UpdateDaemon:
             if result.get('status') == 'success':
                 logger.info(f"Update {update.Version_Number} installed successfully")
                 
-                self._write_status({
-                    'status': 'completed',
-                    'current_update': update.id,
-                    'version': update.Version_Number,
-                    'completed_at': datetime.now().isoformat(),
-                    'message': f'Update {update.Version_Number} installed successfully'
-                })
-                
-                self._write_progress({
-                    'update_id': update.id,
-                    'progress': 100,
-                    'status': 'completed',
-                    'message': 'Installation completed successfully'
-                })
+                self._write_state(
+                    status_data={
+                        'status': 'completed',
+                        'current_update': update.id,
+                        'version': update.Version_Number,
+                        'completed_at': datetime.now().isoformat(),
+                        'message': f'Update {update.Version_Number} installed successfully'
+                    },
+                    progress_data={
+                        'update_id': update.id,
+                        'progress': 100,
+                        'status': 'completed',
+                        'message': 'Installation completed successfully'
+                    }
+                )
                 
                 # Schedule server restart if recommended
                 if result.get('restart_recommended'):
@@ -215,22 +415,23 @@ class UpdateDaemon:
                 error_msg = result.get('message', 'Unknown error')
                 logger.error(f"Update {update.Version_Number} failed: {error_msg}")
                 
-                self._write_status({
-                    'status': 'failed',
-                    'current_update': update.id,
-                    'version': update.Version_Number,
-                    'failed_at': datetime.now().isoformat(),
-                    'message': f'Update failed: {error_msg}',
-                    'error': error_msg
-                })
-                
-                self._write_progress({
-                    'update_id': update.id,
-                    'progress': update.Progress or 0,
-                    'status': 'failed',
-                    'message': f'Installation failed: {error_msg}',
-                    'error': error_msg
-                })
+                self._write_state(
+                    status_data={
+                        'status': 'failed',
+                        'current_update': update.id,
+                        'version': update.Version_Number,
+                        'failed_at': datetime.now().isoformat(),
+                        'message': f'Update failed: {error_msg}',
+                        'error': error_msg
+                    },
+                    progress_data={
+                        'update_id': update.id,
+                        'progress': update.Progress or 0,
+                        'status': 'failed',
+                        'message': f'Installation failed: {error_msg}',
+                        'error': error_msg
+                    }
+                )
                 
         except Exception as e:
             logger.error(f"Unexpected error processing update {update.id}: {e}")
@@ -244,6 +445,8 @@ class UpdateDaemon:
             })
             
         finally:
+            # Make sure every installer line is on disk before going idle
+            self._log_queue.join()
             self.current_update_id = None
             
     def _schedule_server_restart(self):
@@ -270,65 +473,214 @@ class UpdateDaemon:
         except Exception as e:
             logger.error(f"Error scheduling server restart: {e}")
             
-    def _append_log(self, update_id, message):
-        """Append log message to progress file"""
-        try:
-            progress_data = self._read_progress()
-            if not progress_data:
-                progress_data = {'logs': []}
+    def _queue_log(self, update_id, message):
+        """Hand a log line to the writer thread, dropping the oldest line if it falls behind"""
+        if self._log_thread is None:
+            self._log_thread = threading.Thread(
+                target=self._log_writer, name='UpdateLogWriter', daemon=True
+            )
+            self._log_thread.start()
+            
+        item = (update_id, datetime.now().strftime('%H:%M:%S'), message)
+        while True:
+            try:
+                self._log_queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._log_queue.get_nowait()
+                    self._log_queue.task_done()
+                except queue.Empty:
+                    pass
+                    
+    def _log_writer(self):
+        """Drain queued log lines, writing each batch with a single append"""
+        while True:
+            batch = [self._log_queue.get()]
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(self._log_queue.get_nowait())
+                except queue.Empty:
+                    break
+                    
+            entries = [item for item in batch if item is not None]
+            if entries:
+                self._append_log(entries)
+                self._recent_logs.extend(
+                    f"[{timestamp}] {message}" for _, timestamp, message in entries
+                )
+            for _ in batch:
+                self._log_queue.task_done()
                 
-            if 'logs' not in progress_data:
-                progress_data['logs'] = []
+            if len(entries) < len(batch):
+                return
                 
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            progress_data['logs'].append(f"[{timestamp}] {message}")
-            
-            # Keep only last 100 log entries
-            if len(progress_data['logs']) > 100:
-                progress_data['logs'] = progress_data['logs'][-100:]
+    def _append_log(self, entries):
+        """Append (update_id, timestamp, message) entries to the installer log file"""
+        try:
+            lines = ''.join(
+                json.dumps({'update_id': update_id, 'ts': timestamp, 'msg': message}) + '\n'
+                for update_id, timestamp, message in entries
+            )
+            
+            with self._update_log_lock:
+                if self._update_log_fp is None:
+                    self._update_log_fp = open(self.update_log_file, 'a')
+                    
+                # Rotate once the log grows past its limit
+                if self._update_log_fp.tell() >= UPDATE_LOG_MAX_BYTES:
+                    self._update_log_fp.flush()
+                    self._drop_page_cache(self._update_log_fp.fileno())
+                    self._update_log_fp.close()
+                    os.replace(self.update_log_file, self.update_log_file.with_suffix('.ndjson.1'))
+                    self._update_log_fp = open(self.update_log_file, 'a')
+                    
+                self._update_log_fp.write(lines)
+                self._update_log_fp.flush()
                 
-            self._write_progress(progress_data)
-            
         except Exception as e:
             logger.error(f"Error appending log: {e}")
             
-    def _write_status(self, status_data):
-        """Write daemon status to file"""
+    def _read_recent_logs(self, update_id):
+        """Read the latest installer log lines for an update from the log file's tail"""
+        logs = deque(maxlen=PROGRESS_LOG_LINES)
         try:
-            with open(self.status_file, 'w') as f:
-                json.dump(status_data, f, indent=2)
+            with open(self.update_log_file, 'rb') as f:
+                size = f.seek(0, os.SEEK_END)
+                f.seek(max(0, size - PROGRESS_LOG_TAIL_BYTES))
+                if size > PROGRESS_LOG_TAIL_BYTES:
+                    f.readline()  # Skip the partial first line
+                for raw in f:
+                    try:
+                        entry = json.loads(raw)
+                    except ValueError:
+                        continue
+                    if entry.get('update_id') == update_id:
+                        logs.append(f"[{entry.get('ts')}] {entry.get('msg')}")
+        except FileNotFoundError:
+            pass
         except Exception as e:
-            logger.error(f"Error writing status: {e}")
+            logger.error(f"Error reading update log: {e}")
+        return list(logs)
+            
+    def _write_json_file(self, path, data):
+        """
+        Write an encoded JSON payload to a sibling temp file and rename it
+        over path, so readers see either the old or the new payload in full
+        """
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+            
+    def _drop_page_cache(self, fd):
+        """Tell the kernel a file we are done with need not stay in the page cache"""
+        if hasattr(os, 'posix_fadvise'):
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+            except OSError:
+                pass
+                
+    def _write_state(self, status_data=None, progress_data=None):
+        """
+        Update daemon status and/or progress and write both to the state
+        file in one write, skipping the write when neither changed
+        """
+        changed = False
+        if status_data is not None and status_data != self._state['status']:
+            self._state['status'] = status_data
+            self._status_bytes = json.dumps(status_data).encode()
+            changed = True
+        if progress_data is not None and progress_data != self._progress_data:
+            self._progress_data = dict(progress_data)
+            progress_data['updated_at'] = datetime.now().isoformat()
+            self._state['progress'] = progress_data
+            changed = True
+        if not changed:
+            return
             
-    def _read_status(self):
-        """Read daemon status from file"""
         try:
-            if self.status_file.exists():
-                with open(self.status_file, 'r') as f:
-                    return json.load(f)
+            self._write_json_file(self.state_file, json.dumps(self._state, indent=2).encode())
         except Exception as e:
-            logger.error(f"Error reading status: {e}")
-        return None
+            logger.error(f"Error writing daemon state: {e}")
+            
+    def _write_status(self, status_data):
+        """Write daemon status to the state file"""
+        self._write_state(status_data=status_data)
         
     def _write_progress(self, progress_data):
-        """Write update progress to file"""
-        try:
-            progress_data['updated_at'] = datetime.now().isoformat()
-            with open(self.progress_file, 'w') as f:
-                json.dump(progress_data, f, indent=2)
-        except Exception as e:
-            logger.error(f"Error writing progress: {e}")
-            
-    def _read_progress(self):
-        """Read update progress from file"""
+        """Write update progress snapshot to the state file"""
+        self._write_state(progress_data=progress_data)
+        
+    def _read_state(self):
+        """Read the daemon state file"""
         try:
-            if self.progress_file.exists():
-                with open(self.progress_file, 'r') as f:
+            if self.state_file.exists():
+                with open(self.state_file, 'r') as f:
                     return json.load(f)
         except Exception as e:
-            logger.error(f"Error reading progress: {e}")
+            logger.error(f"Error reading daemon state: {e}")
         return None
         
+    def _read_status(self):
+        """Read daemon status from the state file"""
+        state = self._read_state()
+        return state.get('status') if state else None
+            
+    def _start_status_server(self):
+        """Serve in-memory status and progress on a UNIX socket from a background thread"""
+        try:
+            if self.status_socket.exists():
+                self.status_socket.unlink()
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(str(self.status_socket))
+            server.listen(8)
+        except OSError as e:
+            logger.warning(f"Status socket unavailable, clients will read the state file: {e}")
+            return
+            
+        self._status_server = server
+        threading.Thread(target=self._serve_status, args=(server,), name='UpdateStatusServer', daemon=True).start()
+        
+    def _serve_status(self, server):
+        """Answer 'status' and 'progress' requests until the server socket is closed"""
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+                
+            with conn:
+                try:
+                    conn.settimeout(STATUS_SOCKET_TIMEOUT)
+                    request = conn.recv(64).strip()
+                    if request == b'status':
+                        payload = self._status_bytes or b'null'
+                    elif request == b'progress':
+                        payload = self._progress_payload()
+                    else:
+                        payload = b'null'
+                    conn.sendall(payload)
+                except OSError:
+                    pass
+                    
+    def _progress_payload(self):
+        """Encode the current progress snapshot with its recent log lines"""
+        snapshot = self._state['progress']
+        if snapshot is None:
+            return b'null'
+        if 'update_id' in snapshot:
+            snapshot = dict(snapshot, logs=list(self._recent_logs))
+        return json.dumps(snapshot).encode()
+        
+    def _read_progress(self):
+        """Read update progress from the state file, merged with its recent log lines"""
+        state = self._read_state()
+        progress_data = state.get('progress') if state else None
+        if progress_data and 'update_id' in progress_data:
+            progress_data['logs'] = self._read_recent_logs(progress_data['update_id'])
+        return progress_data
+        
     def is_running(self):
         """Check if daemon is currently running"""
         try:
@@ -338,19 +690,64 @@ class UpdateDaemon:
             with open(self.pid_file, 'r') as f:
                 pid = int(f.read().strip())
                 
-            # Check if process exists
-            try:
-                os.kill(pid, 0)  # Doesn't actually kill, just checks if process exists
+            if self._pid_alive(pid):
                 return True
-            except OSError:
-                # Process doesn't exist, clean up stale PID file
-                self.pid_file.unlink()
-                return False
+                
+            # Process doesn't exist, clean up stale PID file
+            self.pid_file.unlink()
+            return False
                 
         except Exception as e:
             logger.error(f"Error checking daemon status: {e}")
             return False
             
+    def _acquire_pidfile(self, retry=True):
+        """
+        Atomically create the PID file with our PID. An existing file is
+        removed and the create retried once, but only if its daemon is dead
+        """
+        try:
+            fd = os.open(self.pid_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            if not retry:
+                return False
+            try:
+                pid = int(self.pid_file.read_text().strip())
+            except FileNotFoundError:
+                return self._acquire_pidfile(retry=False)
+            except ValueError:
+                pid = None
+            if pid is not None and self._pid_alive(pid):
+                return False
+            self.pid_file.unlink(missing_ok=True)
+            return self._acquire_pidfile(retry=False)
+            
+        try:
+            os.write(fd, str(os.getpid()).encode())
+        finally:
+            os.close(fd)
+        return True
+        
+    def _pid_alive(self, pid):
+        """
+        Check that pid is a live update daemon. A recycled PID now owned by
+        an unrelated process (or a zombie, whose cmdline is empty) counts as dead
+        """
+        try:
+            with open(f'/proc/{pid}/cmdline', 'rb') as f:
+                return b'update_daemon' in f.read()
+        except FileNotFoundError:
+            return False
+        except OSError:
+            # No procfs; fall back to a plain existence check
+            try:
+                os.kill(pid, 0)
+                return True
+            except ProcessLookupError:
+                return False
+            except PermissionError:
+                return True
+                
     def stop_daemon(self):
         """Stop the daemon gracefully"""
         try:
@@ -362,30 +759,65 @@ class UpdateDaemon:
                 pid = int(f.read().strip())
                 
             logger.info(f"Stopping daemon with PID {pid}")
-            os.kill(pid, signal.SIGTERM)
             
-            # Wait for daemon to stop
-            for _ in range(30):  # Wait up to 30 seconds
-                if not self.is_running():
+            # Hold a pidfd before signalling, so the wait tracks this exact process
+            try:
+                pidfd = os.pidfd_open(pid)
+            except (AttributeError, OSError):
+                pidfd = None
+                
+            try:
+                os.kill(pid, signal.SIGTERM)
+                
+                # Wait for daemon to stop
+                if self._wait_for_exit(pid, pidfd, STOP_TIMEOUT):
                     logger.info("Daemon stopped successfully")
                     return True
-                time.sleep(1)
-                
-            # Force kill if it didn't stop gracefully
-            logger.warning("Daemon didn't stop gracefully, force killing")
-            os.kill(pid, signal.SIGKILL)
-            return True
+                    
+                # Force kill if it didn't stop gracefully
+                logger.warning("Daemon didn't stop gracefully, force killing")
+                os.kill(pid, signal.SIGKILL)
+                self._wait_for_exit(pid, pidfd, KILL_TIMEOUT)
+                self.pid_file.unlink(missing_ok=True)
+                return True
+            finally:
+                if pidfd is not None:
+                    os.close(pidfd)
             
         except Exception as e:
             logger.error(f"Error stopping daemon: {e}")
             return False
             
+    def _wait_for_exit(self, pid, pidfd, timeout):
+        """
+        Wait up to timeout seconds for pid to exit. A pidfd becomes readable
+        the moment the process exits; without one, fall back to short polls
+        """
+        if pidfd is not None:
+            poller = select.poll()
+            poller.register(pidfd, select.POLLIN)
+            return bool(poller.poll(timeout * 1000))
+            
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self._pid_alive(pid):
+                return True
+            time.sleep(0.1)
+        return False
+        
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals"""
         logger.info(f"Received signal {signum}, shutting down daemon")
         self.shutdown_requested = True
         self.running = False
         
+        # Wake the idle loop right away
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b'x')
+            except OSError:
+                pass
+        
     def _cleanup(self):
         """Clean up daemon resources"""
         try:
@@ -400,34 +832,106 @@ class UpdateDaemon:
             if self.pid_file.exists():
                 self.pid_file.unlink()
                 
+            # Stop answering status queries
+            if self._status_server is not None:
+                self._status_server.close()
+                self._status_server = None
+                if self.status_socket.exists():
+                    self.status_socket.unlink()
+                
+            # Stop the log writer and close the installer log
+            if self._log_thread is not None:
+                self._log_queue.put(None)
+                self._log_thread.join(timeout=5)
+                self._log_thread = None
+            with self._update_log_lock:
+                if self._update_log_fp is not None:
+                    self._update_log_fp.flush()
+                    self._drop_page_cache(self._update_log_fp.fileno())
+                    self._update_log_fp.close()
+                    self._update_log_fp = None
+            
+            # Close wakeup sources
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+            for fd in (self._wake_r, self._wake_w):
+                if fd is not None:
+                    os.close(fd)
+            self._wake_r = self._wake_w = None
+                
             logger.info("Daemon cleanup completed")
             
+            # Flush the remaining log records
+            self._stop_logging()
+            
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
 
+_daemon_instance = None
+_daemon_instance_lock = threading.Lock()
+
+def _get_daemon():
+    """Return the process-wide UpdateDaemon used by the functions below"""
+    global _daemon_instance
+    if _daemon_instance is None:
+        with _daemon_instance_lock:
+            if _daemon_instance is None:
+                _daemon_instance = UpdateDaemon()
+    return _daemon_instance
+
+def notify_daemon():
+    """Wake the daemon so it picks up a newly queued update right away"""
+    DAEMON_DIR.mkdir(parents=True, exist_ok=True)
+    (DAEMON_DIR / TRIGGER_FILE_NAME).touch()
+
 def start_daemon():
     """Start the update daemon"""
-    daemon = UpdateDaemon()
+    daemon = _get_daemon()
     return daemon.start_daemon()
 
 def stop_daemon():
     """Stop the update daemon"""
-    daemon = UpdateDaemon()
+    daemon = _get_daemon()
     return daemon.stop_daemon()
 
 def is_daemon_running():
     """Check if update daemon is running"""
-    daemon = UpdateDaemon()
+    daemon = _get_daemon()
     return daemon.is_running()
 
+def _query_daemon(request):
+    """Ask the running daemon for 'status' or 'progress' over its socket, or return None"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(STATUS_SOCKET_TIMEOUT)
+            client.connect(str(DAEMON_DIR / STATUS_SOCKET_NAME))
+            client.sendall(request.encode())
+            client.shutdown(socket.SHUT_WR)
+            chunks = []
+            while True:
+                chunk = client.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        return json.loads(b''.join(chunks))
+    except (OSError, ValueError):
+        return None
+
 def get_daemon_status():
     """Get current daemon status"""
-    daemon = UpdateDaemon()
+    status = _query_daemon('status')
+    if status is not None:
+        return status
+    daemon = _get_daemon()
     return daemon._read_status()
 
 def get_update_progress():
     """Get current update progress"""
-    daemon = UpdateDaemon()
+    progress = _query_daemon('progress')
+    if progress is not None:
+        return progress
+    daemon = _get_daemon()
     return daemon._read_progress()
 
 if __name__ == '__main__':
@@ -1,19 +1,155 @@
 import os
 import json
+import errno
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import zipfile
 import shutil
 import subprocess
 import sys
+import time
+import heapq
+import queue
+from functools import lru_cache
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone as dt_timezone
 from django.utils import timezone
 from django.conf import settings
+from django.core.cache import cache
 from django.core.files.storage import default_storage
+from django.db import transaction
 from app.models import SystemUpdate, UpdateSettings
 import logging
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 logger = logging.getLogger(__name__)
 
+# ETag of the last releases response, sent back as If-None-Match so an
+# unchanged release list costs a bodiless 304 (which GitHub does not rate-limit)
+RELEASES_ETAG_CACHE_KEY = 'github:releases_etag:{url}'
+RELEASES_ETAG_CACHE_TIMEOUT = 24 * 3600  # seconds
+
+# Shared HTTP session for GitHub API and download requests, so update checks
+# and downloads reuse pooled connections; transient gateway errors are retried
+_http_session = requests.Session()
+_http_session.mount('https://', HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504], raise_on_status=False)
+))
+
+# Update downloads: bytes per network read, and chunks buffered between the
+# network reader thread and the disk writer
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+DOWNLOAD_PREFETCH_CHUNKS = 2
+
+# Minimum seconds between download progress saves
+DOWNLOAD_PROGRESS_SAVE_INTERVAL = 1.0
+
+# Command output lines (migrate, collectstatic) are persisted to the
+# installation log every this many lines or seconds, not once per line
+STREAM_LOG_SAVE_LINES = 200
+STREAM_LOG_SAVE_INTERVAL = 5.0
+
+# Parallel file copies when restoring a backup (copy2 releases the GIL during I/O)
+RESTORE_COPY_WORKERS = 4
+
+
+# Files/directories in an update that are never copied into the project:
+# directory names starting with a prefix anywhere, project-level runtime
+# directories, user content directories (matched by trailing path), and
+# files by suffix or exact name
+EXCLUDE_DIR_PREFIXES = ('.git', '__pycache__')
+EXCLUDE_ROOT_DIRS = frozenset({'temp', 'backups'})
+EXCLUDE_DIR_PATH_SUFFIXES = ('/static/background',)
+EXCLUDE_FILE_SUFFIXES = ('.pyc',)
+EXCLUDE_FILE_NAMES = frozenset({'.gitignore', 'README.md', 'LICENSE', 'db.sqlite3'})
+
+
+def _is_excluded_dir(rel_dir):
+    """Check a directory, given relative to the update root with '/' separators"""
+    name = rel_dir.rpartition('/')[2]
+    return (
+        name.startswith(EXCLUDE_DIR_PREFIXES)
+        or rel_dir in EXCLUDE_ROOT_DIRS
+        or ('/' + rel_dir).endswith(EXCLUDE_DIR_PATH_SUFFIXES)
+    )
+
+
+def _is_excluded_file(name):
+    """Check a file name against the update exclude patterns"""
+    return name.endswith(EXCLUDE_FILE_SUFFIXES) or name in EXCLUDE_FILE_NAMES
+
+
+def _is_excluded_member(member_name):
+    """Check a zipball member (under GitHub's top-level folder) against the exclude patterns"""
+    parts = member_name.rstrip('/').split('/')[1:]
+    if not parts:
+        return False
+    dir_parts = parts if member_name.endswith('/') else parts[:-1]
+    for depth in range(1, len(dir_parts) + 1):
+        if _is_excluded_dir('/'.join(dir_parts[:depth])):
+            return True
+    return not member_name.endswith('/') and _is_excluded_file(parts[-1])
+
+
+@lru_cache(maxsize=256)
+def _parse_version(version):
+    """
+    Parse a dotted version into a tuple of ints with trailing zeros dropped,
+    so '1.2' and '1.2.0' compare equal; None if it isn't purely numeric
+    """
+    try:
+        parts = [int(x) for x in version.split('.')]
+    except ValueError:
+        return None
+    while len(parts) > 1 and parts[-1] == 0:
+        parts.pop()
+    return tuple(parts)
+
+
+def _link_tree(src, dst):
+    """
+    Snapshot a directory as a tree of hardlinks, falling back to copies
+    for files that cannot be linked (e.g. across filesystems)
+    """
+    for root, dirs, files in os.walk(src):
+        target_root = os.path.join(dst, os.path.relpath(root, src))
+        os.makedirs(target_root, exist_ok=True)
+        for name in files:
+            src_file = os.path.join(root, name)
+            dst_file = os.path.join(target_root, name)
+            if os.path.lexists(dst_file):
+                os.unlink(dst_file)
+            try:
+                os.link(src_file, dst_file, follow_symlinks=False)
+            except OSError:
+                shutil.copy2(src_file, dst_file, follow_symlinks=False)
+
+
+def _replace_file(src, dst, same_device=True):
+    """
+    Move src over dst as a new inode, so hardlinked backups of dst keep
+    the old contents; copies through a temp file across filesystems
+    """
+    if same_device:
+        try:
+            os.replace(src, dst)
+            return
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+    tmp_file = f"{dst}.tmp"
+    shutil.copy2(src, tmp_file)
+    os.replace(tmp_file, dst)
+
+
 class GitHubUpdateService:
     def __init__(self):
         self.settings = UpdateSettings.load()
@@ -29,24 +165,61 @@ class GitHubUpdateService:
             if self.settings.Update_Channel == 'stable':
                 url += "?prerelease=false"
             
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
+            etag_key = RELEASES_ETAG_CACHE_KEY.format(url=url)
+            headers = {}
+            etag = cache.get(etag_key)
+            if etag:
+                headers['If-None-Match'] = etag
+            
+            response = _http_session.get(url, headers=headers, timeout=30, stream=True)
+            
+            if response.status_code in (403, 429) and response.headers.get('X-RateLimit-Remaining') == '0':
+                reset_at = response.headers.get('X-RateLimit-Reset')
+                reset_msg = ''
+                if reset_at:
+                    reset_msg = f" until {datetime.fromtimestamp(int(reset_at), dt_timezone.utc):%H:%M} UTC"
+                return {
+                    'status': 'error',
+                    'message': f'GitHub API rate limit reached, try again later{reset_msg}'
+                }
+            
+            if response.status_code == 304:
+                # Release list unchanged since the last check
+                releases = []
+            else:
+                response.raise_for_status()
+                if ijson is not None:
+                    # Parse one release at a time instead of loading every release body at once
+                    response.raw.decode_content = True
+                    releases = ijson.items(response.raw, 'item')
+                else:
+                    releases = response.json()
             
-            releases = response.json()
             current_version = self.settings.Current_Version
             
+            # Known versions, loaded once instead of queried per release
+            known_versions = set(SystemUpdate.objects.values_list('Version_Number', flat=True))
+            
             new_updates = []
-            for release in releases:
-                version = release['tag_name'].lstrip('v')
-                
-                # Skip if this version already exists
-                if SystemUpdate.objects.filter(Version_Number=version).exists():
-                    continue
-                
-                # Check if this is a newer version
-                if self._is_newer_version(version, current_version):
-                    update_data = self._parse_release_data(release)
-                    new_updates.append(update_data)
+            try:
+                for release in releases:
+                    version = release['tag_name'].lstrip('v')
+                    
+                    # Skip if this version already exists
+                    if version in known_versions:
+                        continue
+                    
+                    # Check if this is a newer version
+                    if self._is_newer_version(version, current_version):
+                        update_data = self._parse_release_data(release)
+                        new_updates.append(update_data)
+                        known_versions.add(version)
+            finally:
+                response.close()
+            
+            # Only remember the ETag once the whole list has been processed
+            if response.status_code != 304 and response.headers.get('ETag'):
+                cache.set(etag_key, response.headers['ETag'], RELEASES_ETAG_CACHE_TIMEOUT)
             
             # Update last check time
             self.settings.Last_Check = timezone.now()
@@ -71,6 +244,25 @@ class GitHubUpdateService:
                 'message': f'Update check failed: {str(e)}'
             }
     
+    def handle_release_event(self, payload):
+        """Create a SystemUpdate from a GitHub 'release' webhook payload"""
+        release = payload.get('release') or {}
+        repository = (payload.get('repository') or {}).get('full_name', '')
+        
+        if payload.get('action') != 'published' or not release:
+            return {'status': 'ignored', 'message': 'Not a published release'}
+        if repository.lower() != (self.repo or '').lower():
+            return {'status': 'ignored', 'message': f'Release is for {repository}'}
+        if release.get('prerelease') and self.settings.Update_Channel == 'stable':
+            return {'status': 'ignored', 'message': 'Pre-release on stable channel'}
+            
+        update_data = self._parse_release_data(release)
+        if not self._is_newer_version(update_data['version'], self.settings.Current_Version):
+            return {'status': 'ignored', 'message': f"Version {update_data['version']} is not newer"}
+            
+        created = self.create_system_updates([update_data])
+        return {'status': 'success', 'created': len(created), 'version': update_data['version']}
+    
     def _parse_release_data(self, release):
         """Parse GitHub release data into our format"""
         return {
@@ -84,42 +276,39 @@ class GitHubUpdateService:
     
     def _is_newer_version(self, version1, version2):
         """Compare version strings"""
-        try:
-            # Simple version comparison - can be enhanced for semantic versioning
-            v1_parts = [int(x) for x in version1.split('.')]
-            v2_parts = [int(x) for x in version2.split('.')]
-            
-            # Pad shorter version with zeros
-            max_len = max(len(v1_parts), len(v2_parts))
-            v1_parts.extend([0] * (max_len - len(v1_parts)))
-            v2_parts.extend([0] * (max_len - len(v2_parts)))
-            
-            return v1_parts > v2_parts
-        except ValueError:
+        # Simple version comparison - can be enhanced for semantic versioning
+        v1_parts = _parse_version(version1)
+        v2_parts = _parse_version(version2)
+        if v1_parts is None or v2_parts is None:
             # Fallback to string comparison
             return version1 > version2
+        return v1_parts > v2_parts
     
     def create_system_updates(self, updates_data):
         """Create SystemUpdate objects from GitHub data"""
-        created_updates = []
-        
-        for update_data in updates_data:
-            update, created = SystemUpdate.objects.get_or_create(
-                Version_Number=update_data['version'],
-                defaults={
-                    'Update_Title': update_data['title'],
-                    'Description': update_data['description'],
-                    'Release_Date': update_data['release_date'],
-                    'Download_URL': update_data['download_url'],
-                    'File_Size': update_data['file_size'],
-                    'Status': 'available'
-                }
+        with transaction.atomic():
+            # Version_Number is not unique in the schema, so skip existing versions here
+            versions = [update_data['version'] for update_data in updates_data]
+            existing = set(
+                SystemUpdate.objects.filter(Version_Number__in=versions).values_list('Version_Number', flat=True)
             )
             
-            if created:
-                created_updates.append(update)
-        
-        return created_updates
+            new_updates = []
+            for update_data in updates_data:
+                if update_data['version'] in existing:
+                    continue
+                existing.add(update_data['version'])
+                new_updates.append(SystemUpdate(
+                    Version_Number=update_data['version'],
+                    Update_Title=update_data['title'],
+                    Description=update_data['description'],
+                    Release_Date=update_data['release_date'],
+                    Download_URL=update_data['download_url'],
+                    File_Size=update_data['file_size'],
+                    Status='available'
+                ))
+            
+            return SystemUpdate.objects.bulk_create(new_updates, batch_size=500)
 
 
 class UpdateDownloadService:
@@ -140,7 +329,7 @@ class UpdateDownloadService:
             self.update.Progress = 0
             self.update.save()
             
-            response = requests.get(self.update.Download_URL, stream=True, timeout=30)
+            response = _http_session.get(self.update.Download_URL, stream=True, timeout=30)
             response.raise_for_status()
             
             # Get file size
@@ -153,18 +342,26 @@ class UpdateDownloadService:
             filepath = os.path.join(self.download_path, filename)
             
             downloaded = 0
+            last_progress = 0
+            last_save = time.monotonic()
             with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
+                for chunk in self._prefetch_chunks(response):
                     if chunk:
                         f.write(chunk)
                         downloaded += len(chunk)
                         
-                        # Update progress
+                        # Update progress, at most once per interval and only when the percentage moved
                         if total_size > 0:
                             progress = int((downloaded / total_size) * 100)
-                            self.update.Progress = progress
-                            self.update.Downloaded_Bytes = downloaded
-                            self.update.save()
+                            now = time.monotonic()
+                            if progress != last_progress and now - last_save >= DOWNLOAD_PROGRESS_SAVE_INTERVAL:
+                                self.update.Progress = progress
+                                self.update.Downloaded_Bytes = downloaded
+                                self.update.save(update_fields=['Progress', 'Downloaded_Bytes'])
+                                last_progress = progress
+                                last_save = now
+            
+            self.update.Downloaded_Bytes = downloaded
             
             # Verify download
             if os.path.getsize(filepath) == total_size or total_size == 0:
@@ -191,9 +388,50 @@ class UpdateDownloadService:
             return {'status': 'error', 'message': str(e)}
 
 
+    def _prefetch_chunks(self, response):
+        """
+        Yield response chunks read ahead by a background thread, so the
+        next network read overlaps with writing the current chunk to disk
+        """
+        chunks = queue.Queue(maxsize=DOWNLOAD_PREFETCH_CHUNKS)
+        done = object()
+        stop = threading.Event()
+        
+        def reader():
+            try:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if stop.is_set():
+                        return
+                    chunks.put(chunk)
+                chunks.put(done)
+            except Exception as e:
+                chunks.put(e)
+        
+        thread = threading.Thread(target=reader, name='UpdateDownloadReader', daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Unblock the reader if the consumer stopped early; it exits at its next chunk
+            stop.set()
+            while True:
+                try:
+                    chunks.get_nowait()
+                except queue.Empty:
+                    break
+
+
 class UpdateInstallService:
-    def __init__(self, system_update):
+    def __init__(self, system_update, log_callback=None):
         self.update = system_update
+        # Called with (message, level) for every installation log line
+        self.log_callback = log_callback
         self.backup_path = os.path.join(settings.BASE_DIR, 'backups')
         self.temp_path = os.path.join(settings.BASE_DIR, 'temp', 'updates')
         self.installation_log = []
@@ -208,11 +446,18 @@ class UpdateInstallService:
             return '--enable-reload' in sys.argv
         return False
     
-    def _log(self, message, level='INFO'):
+    def _log(self, message, level='INFO', persist=True):
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         log_entry = f"[{timestamp}] [{level}] {message}"
         self.installation_log.append(log_entry)
-        logger.info(log_entry)
+        logger.log(getattr(logging, level, logging.INFO), message)
+        if self.log_callback is not None:
+            self.log_callback(message, level)
+        if persist:
+            self._save_installation_log()
+    
+    def _save_installation_log(self):
+        """Write the collected installation log to the update record"""
         try:
             if hasattr(self.update, 'Installation_Log'):
                 self.update.Installation_Log = '\n'.join(self.installation_log)
@@ -243,8 +488,10 @@ class UpdateInstallService:
                 if os.path.exists(src):
                     dst = os.path.join(backup_dir, path)
                     if os.path.isdir(src):
-                        shutil.copytree(src, dst, dirs_exist_ok=True)
+                        # Hardlinks cost no data copy; updated files are replaced, never rewritten in place
+                        _link_tree(src, dst)
                     else:
+                        # Single files (notably the live database) are real copies
                         os.makedirs(os.path.dirname(dst), exist_ok=True)
                         shutil.copy2(src, dst)
             
@@ -297,11 +544,13 @@ class UpdateInstallService:
             
             try:
                 with zipfile.ZipFile(update_file, 'r') as zip_ref:
-                    total_files = len(zip_ref.namelist())
+                    # Skip members that would be excluded from the copy anyway
+                    members = [info for info in zip_ref.infolist() if not _is_excluded_member(info.filename)]
+                    total_files = len(members)
                     self._log(f"Starting extraction of {total_files} files")
                     
                     # Extract with progress tracking
-                    for i, member in enumerate(zip_ref.namelist()):
+                    for i, member in enumerate(members):
                         zip_ref.extract(member, extract_path)
                         # Update progress during extraction (30% to 50% of total progress)
                         extraction_progress = 30 + int((i / total_files) * 20)
@@ -370,29 +619,17 @@ class UpdateInstallService:
             self._log("This will cause session loss and may interrupt the update process.", "WARNING")
             self._log("STRONGLY RECOMMENDED: Run server without --enable-reload flag during updates.", "WARNING")
         
-        # Files/directories to exclude from copying
-        exclude_patterns = [
-            '.git',
-            '.gitignore',
-            'README.md',
-            'LICENSE',
-            'db.sqlite3',
-            '__pycache__',
-            '*.pyc',
-            'temp/',
-            'backups/',
-            'static/background/'
-        ]
-        
         # First, prepare all files to copy (atomic preparation)
         files_to_copy = []
         for root, dirs, files in os.walk(source_dir):
             # Skip excluded directories
-            dirs[:] = [d for d in dirs if not any(d.startswith(pattern.rstrip('/*')) for pattern in exclude_patterns)]
+            rel_root = os.path.relpath(root, source_dir).replace(os.sep, '/')
+            prefix = '' if rel_root == '.' else rel_root + '/'
+            dirs[:] = [d for d in dirs if not _is_excluded_dir(prefix + d)]
             
             for file in files:
                 # Skip excluded files
-                if any(file.endswith(pattern.lstrip('*')) or file == pattern for pattern in exclude_patterns):
+                if _is_excluded_file(file):
                     continue
                 
                 src_file = os.path.join(root, file)
@@ -409,12 +646,16 @@ class UpdateInstallService:
             shutil.rmtree(staging_dir)
         os.makedirs(staging_dir, exist_ok=True)
         
-        # Copy all files to staging first
-        self._log("Copying files to staging directory...")
+        # Renames only work within one filesystem; check once instead of per file
+        staging_on_source_device = os.stat(source_dir).st_dev == os.stat(staging_dir).st_dev
+        project_on_staging_device = os.stat(staging_dir).st_dev == os.stat(settings.BASE_DIR).st_dev
+        
+        # Move all files to staging first; the extracted tree is discarded afterwards
+        self._log("Moving files to staging directory...")
         for i, (src_file, dst_file) in enumerate(files_to_copy):
             staging_file = os.path.join(staging_dir, os.path.relpath(dst_file, settings.BASE_DIR))
             os.makedirs(os.path.dirname(staging_file), exist_ok=True)
-            shutil.copy2(src_file, staging_file)
+            _replace_file(src_file, staging_file, staging_on_source_device)
             
             # Update progress (50% to 70% of total progress)
             if i % 50 == 0:
@@ -433,8 +674,8 @@ class UpdateInstallService:
             # Create directory if it doesn't exist
             os.makedirs(os.path.dirname(dst_file), exist_ok=True)
             
-            # Copy file from staging
-            shutil.copy2(staging_file, dst_file)
+            # Move file from staging as a new inode, leaving the hardlinked backup intact
+            _replace_file(staging_file, dst_file, project_on_staging_device)
             copied_files += 1
         
         self._log(f"Successfully copied {copied_files} files to project directory")
@@ -450,16 +691,12 @@ class UpdateInstallService:
         try:
             # Run database migrations
             self._log("Running database migrations")
-            result = subprocess.run([
-                'python', 'manage.py', 'migrate'
-            ], cwd=settings.BASE_DIR, check=True, capture_output=True, text=True)
+            self._run_streaming([sys.executable, 'manage.py', 'migrate'])
             self._log("Database migrations completed successfully")
             
             # Collect static files
             self._log("Collecting static files")
-            result = subprocess.run([
-                'python', 'manage.py', 'collectstatic', '--noinput'
-            ], cwd=settings.BASE_DIR, check=True, capture_output=True, text=True)
+            self._run_streaming([sys.executable, 'manage.py', 'collectstatic', '--noinput'])
             self._log("Static files collection completed")
             
             # Check system integrity
@@ -471,6 +708,39 @@ class UpdateInstallService:
             logger.warning(f"Post-install task failed: {e}")
             # Don't fail the entire update for post-install issues
     
+    def _run_streaming(self, args):
+        """
+        Run a command in the project directory, logging its output line by
+        line as it arrives
+        
+        The installation log is saved in batches rather than per line, since
+        the command may be writing to the same database.
+        """
+        process = subprocess.Popen(
+            args, cwd=settings.BASE_DIR, stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, text=True, bufsize=1
+        )
+        unsaved = 0
+        last_save = time.monotonic()
+        try:
+            with process:
+                for line in process.stdout:
+                    line = line.rstrip()
+                    if not line:
+                        continue
+                    self._log(line, persist=False)
+                    unsaved += 1
+                    now = time.monotonic()
+                    if unsaved >= STREAM_LOG_SAVE_LINES or now - last_save >= STREAM_LOG_SAVE_INTERVAL:
+                        self._save_installation_log()
+                        unsaved = 0
+                        last_save = now
+        finally:
+            if unsaved:
+                self._save_installation_log()
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, args)
+    
     def _check_system_integrity(self):
         """Check system integrity after installation"""
         try:
@@ -588,18 +858,27 @@ class UpdateInstallService:
             # Restore from backup
             backup_dir = self.update.Backup_Path
             
-            # Copy backup files back
+            # Collect backup files to copy back
+            files_to_restore = []
             for root, dirs, files in os.walk(backup_dir):
+                # Create directories up front so the copy threads don't race on them
+                os.makedirs(os.path.join(settings.BASE_DIR, os.path.relpath(root, backup_dir)), exist_ok=True)
+                
                 for file in files:
                     src_file = os.path.join(root, file)
                     rel_path = os.path.relpath(src_file, backup_dir)
                     dst_file = os.path.join(settings.BASE_DIR, rel_path)
                     
-                    # Create directory if it doesn't exist
-                    os.makedirs(os.path.dirname(dst_file), exist_ok=True)
+                    # Files the update didn't touch are still hardlinked to the backup
+                    if os.path.exists(dst_file) and os.path.samefile(src_file, dst_file):
+                        continue
                     
-                    # Copy file
-                    shutil.copy2(src_file, dst_file)
+                    files_to_restore.append((src_file, dst_file))
+            
+            # Copy files
+            with ThreadPoolExecutor(max_workers=RESTORE_COPY_WORKERS) as executor:
+                for _ in executor.map(lambda pair: shutil.copy2(*pair), files_to_restore):
+                    pass
             
             # Run migrations to ensure database consistency
             subprocess.run([
@@ -612,6 +891,16 @@ class UpdateInstallService:
             return {'status': 'error', 'message': str(e)}
 
 
+def _remove_backups(paths):
+    """Delete pruned backup directories"""
+    for path in paths:
+        try:
+            shutil.rmtree(path)
+            logger.info(f"Removed old backup: {path}")
+        except Exception as e:
+            logger.error(f"Failed to remove old backup {path}: {e}")
+
+
 def cleanup_old_backups():
     """Clean up old backup files"""
     try:
@@ -622,20 +911,22 @@ def cleanup_old_backups():
             return
         
         # Get all backup directories
-        backups = []
-        for item in os.listdir(backup_path):
-            item_path = os.path.join(backup_path, item)
-            if os.path.isdir(item_path) and item.startswith('backup_'):
-                backups.append((item_path, os.path.getctime(item_path)))
-        
-        # Sort by creation time (newest first)
-        backups.sort(key=lambda x: x[1], reverse=True)
+        with os.scandir(backup_path) as entries:
+            backups = [
+                (entry.path, entry.stat().st_ctime)
+                for entry in entries
+                if entry.name.startswith('backup_') and entry.is_dir()
+            ]
         
-        # Remove old backups
+        # Keep the newest backups by creation time
         if len(backups) > settings_obj.Max_Backup_Count:
-            for backup_path, _ in backups[settings_obj.Max_Backup_Count:]:
-                shutil.rmtree(backup_path)
-                logger.info(f"Removed old backup: {backup_path}")
+            keep = {path for path, _ in heapq.nlargest(settings_obj.Max_Backup_Count, backups, key=lambda x: x[1])}
+            old_backups = [path for path, _ in backups if path not in keep]
+            
+            # Remove old backups in the background; large trees take a while to delete
+            threading.Thread(
+                target=_remove_backups, args=(old_backups,), name='UpdateBackupCleanup'
+            ).start()
         
     except Exception as e:
         logger.error(f"Backup cleanup error: {e}")
@@ -646,13 +937,18 @@ def auto_check_updates():
     try:
         settings_obj = UpdateSettings.load()
         
+        # With the release webhook configured, polling is only a heartbeat
+        interval_hours = settings_obj.Check_Interval_Hours
+        if settings.GITHUB_WEBHOOK_SECRET:
+            interval_hours = max(interval_hours, settings.GITHUB_WEBHOOK_HEARTBEAT_HOURS)
+        
         if not settings_obj.Last_Check:
             # First time check
             should_check = True
         else:
             # Check if enough time has passed
             time_since_check = timezone.now() - settings_obj.Last_Check
-            should_check = time_since_check.total_seconds() >= (settings_obj.Check_Interval_Hours * 3600)
+            should_check = time_since_check.total_seconds() >= (interval_hours * 3600)
         
         if should_check:
             service = GitHubUpdateService()
@@ -0,0 +1,34 @@
+"""
+Celery tasks for long-running background jobs
+Used by the database backup service when a Celery broker is configured
+"""
+try:
+    from celery import shared_task
+except ImportError:
+    shared_task = None
+
+
+def _run_backup(backup_id, backup_type='full', tables=None):
+    """Create a database backup in a worker process"""
+    from .models import DatabaseBackup
+    from .services.database_backup_service import database_backup_service
+    
+    backup_obj = DatabaseBackup.objects.get(id=backup_id)
+    return database_backup_service.create_backup(backup_obj, backup_type, tables)
+
+
+def _run_restore(backup_id):
+    """Restore a database backup in a worker process"""
+    from .models import DatabaseBackup
+    from .services.database_backup_service import database_backup_service
+    
+    backup_obj = DatabaseBackup.objects.get(id=backup_id)
+    return database_backup_service.restore_backup(backup_obj)
+
+
+if shared_task is not None:
+    run_backup = shared_task(name='app.tasks.run_backup', queue='backups', acks_late=True)(_run_backup)
+    run_restore = shared_task(name='app.tasks.run_restore', queue='backups', acks_late=True)(_run_restore)
+else:
+    run_backup = None
+    run_restore = None
@@ -0,0 +1,57 @@
+import os
+import json
+import shutil
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+
+from django.test import TestCase
+
+from app.models import ConnectionTracker
+from app.services.database_backup_service import database_backup_service
+
+
+class BulkRestoreTests(TestCase):
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.work_dir, ignore_errors=True)
+    
+    def _write_fixture(self, records):
+        path = os.path.join(self.work_dir, 'backup.json')
+        with open(path, 'w') as f:
+            json.dump(records, f)
+        return path
+    
+    def _record(self, pk, connected_at, last_activity):
+        return {
+            'model': 'app.connectiontracker',
+            'pk': pk,
+            'fields': {
+                'Device_MAC': f'aa:bb:cc:dd:ee:{pk:02x}',
+                'Connection_IP': '10.0.0.2',
+                'Session_ID': f'session-{pk}',
+                'Connected_At': connected_at.isoformat(),
+                'Last_Activity': last_activity.isoformat(),
+                'Is_Active': False,
+                'TTL_Classification': 'normal',
+                'User_Agent': None,
+            },
+        }
+    
+    def test_restore_keeps_auto_now_timestamps(self):
+        existing = ConnectionTracker.objects.create(
+            Device_MAC='aa:bb:cc:dd:ee:01', Connection_IP='10.0.0.1', Session_ID='live'
+        )
+        connected_at = datetime(2024, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc)
+        last_activity = datetime(2024, 1, 2, 6, 7, 8, tzinfo=dt_timezone.utc)
+        path = self._write_fixture([
+            self._record(existing.pk, connected_at, last_activity),
+            self._record(existing.pk + 1, connected_at, last_activity),
+        ])
+        
+        database_backup_service._bulk_restore(path)
+        
+        for pk in (existing.pk, existing.pk + 1):
+            restored = ConnectionTracker.objects.get(pk=pk)
+            self.assertEqual(restored.Connected_At, connected_at)
+            self.assertEqual(restored.Last_Activity, last_activity)
+            self.assertEqual(restored.Session_ID, f'session-{pk}')
@@ -0,0 +1,11 @@
+"""
+Webhook URLs
+"""
+from django.urls import path
+from app.views.webhook_views import github_release_webhook
+
+app_name = 'webhooks'
+
+urlpatterns = [
+    path('github/release/', github_release_webhook, name='github_release'),
+]
@@ -0,0 +1,55 @@
+"""
+Webhook Views for external services
+"""
+from django.conf import settings
+from django.http import JsonResponse
+from django.views.decorators.http import require_http_methods
+from django.views.decorators.csrf import csrf_exempt
+from app.services.update_service import GitHubUpdateService
+import hashlib
+import hmac
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _valid_github_signature(request):
+    """Check the X-Hub-Signature-256 HMAC against GITHUB_WEBHOOK_SECRET"""
+    secret = settings.GITHUB_WEBHOOK_SECRET
+    signature = request.headers.get('X-Hub-Signature-256', '')
+    if not secret or not signature.startswith('sha256='):
+        return False
+    expected = hmac.new(secret.encode(), request.body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature[len('sha256='):], expected)
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+def github_release_webhook(request):
+    """Receive GitHub release events and register new updates"""
+    if not settings.GITHUB_WEBHOOK_SECRET:
+        return JsonResponse({'status': 'error', 'message': 'Webhook not configured'}, status=404)
+    if not _valid_github_signature(request):
+        logger.warning("Rejected GitHub webhook with invalid signature")
+        return JsonResponse({'status': 'error', 'message': 'Invalid signature'}, status=403)
+        
+    event = request.headers.get('X-GitHub-Event', '')
+    if event == 'ping':
+        return JsonResponse({'status': 'success', 'message': 'pong'})
+    if event != 'release':
+        return JsonResponse({'status': 'ignored', 'message': f'Unhandled event: {event}'})
+        
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': 'Invalid JSON'}, status=400)
+        
+    try:
+        result = GitHubUpdateService().handle_release_event(payload)
+    except Exception as e:
+        logger.error(f"GitHub release webhook failed: {e}")
+        return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
+        
+    logger.info(f"GitHub release webhook: {result}")
+    return JsonResponse(result)
@@ -0,0 +1,21 @@
+"""
+Celery application for background jobs (optional)
+
+Only used when Celery is installed and CELERY_BROKER_URL is set; otherwise
+background jobs fall back to in-process threads.
+"""
+import os
+
+try:
+    from celery import Celery
+except ImportError:
+    Celery = None
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "opw.settings")
+
+if Celery is not None:
+    celery_app = Celery("opw")
+    celery_app.config_from_object("django.conf:settings", namespace="CELERY")
+    celery_app.autodiscover_tasks()
+else:
+    celery_app = None
@@ -111,7 +111,14 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    },
+    # Second connection to the same database, used by database backups so
+    # their long reads run in their own transaction
+    'backup': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -431,6 +438,24 @@ CACHES = {
     }
 }
 
+# Celery Configuration (optional - backups run in threads when no broker is set)
+CELERY_BROKER_URL = get_env_variable('CELERY_BROKER_URL', '')
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ROUTES = {
+    'app.tasks.run_backup': {'queue': 'backups'},
+    'app.tasks.run_restore': {'queue': 'backups'},
+}
+
+# Server type running Django (gunicorn, uwsgi or runserver); skips
+# detecting it from the process tree when set
+PISOWIFI_SERVER_TYPE = get_env_variable('PISOWIFI_SERVER_TYPE', '')
+
+# GitHub release webhook; when a secret is set, new releases arrive through
+# the webhook and GitHub is only polled as a heartbeat
+GITHUB_WEBHOOK_SECRET = get_env_variable('GITHUB_WEBHOOK_SECRET', '')
+GITHUB_WEBHOOK_HEARTBEAT_HOURS = int(get_env_variable('GITHUB_WEBHOOK_HEARTBEAT_HOURS', '168'))
+
 # Rate Limiting Configuration
 RATELIMIT_USE_CACHE = 'default'
 RATELIMIT_ENABLE = True
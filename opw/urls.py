@@ -20,6 +20,7 @@ urlpatterns = [
     path('app/api/', include('app.api.urls')),
     path('admin/security/', include('app.security.urls')),
     path('admin/system-info/', include('app.urls.system_info_urls', namespace='system_info')),
+    path('webhooks/', include('app.urls.webhook_urls', namespace='webhooks')),
     path('favicon.ico', favicon_view, name='favicon'),
     path('', RedirectView.as_view(url='/app/portal')),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)